@@ -0,0 +1,39 @@
+# card abstraction, merging the information sets of similar private info
+import store
+"""
+a bucketing maps every private info of a game onto one of a fixed number of
+buckets, and a game using it builds information set keys from the bucket
+instead of the private info itself. cards in the same bucket then share every
+information set, so the node count is bounded by the number of buckets
+rather than the size of the deck, at the cost of playing them alike.
+
+the strategy of an abstracted game is only a best response away from
+equilibrium within the abstraction. lifting it into the unabstracted game,
+where every card plays the strategy of its bucket, gives its exploitability
+in the real game, which is what the abstraction trades against memory.
+"""
+
+def uniform(privates: list, buckets: int, strength=None) -> dict:
+    """ Maps privates, weakest first or ordered by strength, onto buckets
+    of as equal sizes as possible. """
+    ordered = list(privates) if strength is None else sorted(privates, key=strength)
+    n = len(ordered)
+    return {info: i*buckets//n for i, info in enumerate(ordered)}
+
+def lift(game, abstract, nodes: store.Store) -> store.Store:
+    """ Gets a node table of the unabstracted game with the average strategy of
+    every information set taken from the abstracted game's nodes. """
+    full = store.Store(game.ACTIONS)
+    histories = [game.root()]
+    while histories:
+        history = histories.pop()
+        if game.util(game.deals[0], history) is not None:
+            continue
+        actions = game.legal(history)
+        for info in game.privates:
+            key = game.hash_info_set(info, history)
+            if key not in full:
+                node = full.add(key, game.format_info_set(info, history), actions.start, actions.stop)
+                full.strategy_sum[node.i] = nodes.strategy_sum[nodes.ids[abstract.hash_info_set(info, history)]]
+        histories += [game.play(history, a) for a in actions]
+    return full
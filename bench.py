@@ -0,0 +1,185 @@
+# benchmarks for the training engines
+import json, multiprocessing, os, random, resource, sys, time
+import cfr, store, tree, metrics, registry
+"""
+every case runs in a freshly spawned process, so games can be set up with
+their own parameters and the peak memory is the case's own. a case reports
+
+    -   iterations/sec: iterations of the trainer per second
+    -        nodes/sec: nodes touched per second, the regret of each action for
+                        normal form games and every history of every deal
+                        traversed for extensive-form games, None for the
+                        sampling engines, which do not walk the whole tree
+    -   peak memory MB: the peak resident memory of the process
+    - time to target s: seconds until the exploitability is at most the
+                        target, or None if it never gets there
+
+the results are written as json and compared against a stored baseline, any
+rate more than TOLERANCE below it or cost more than TOLERANCE above it being
+a regression. dudo only deals a die to each player, so it is only benchmarked
+with D at 2, and bitdudo covers more dice, sampled where the tree does not fit.
+"""
+
+SEED = 7
+TOLERANCE = 0.25
+# seconds a time may grow by on top of the tolerance, as short times are noisy
+SLACK = 0.05
+RESULTS, BASELINE = "bench.json", "bench_baseline.json"
+
+# the exploitability targets are in units per game for normal form games and
+# thousandths of a unit per game for extensive-form ones, checked every check
+CASES = [
+    {"name": "regret rps", "game": "rps", "trainer": "regret", "iters": 10**5, "target": 1e-4, "check": 100},
+    {"name": "normal rps", "game": "rps", "trainer": "normal", "iters": 2*10**4, "target": 1e-3, "check": 100},
+    {"name": "normal blotto 5/3", "game": "blotto", "params": [5, 3], "trainer": "normal",
+     "iters": 10**4, "target": 1e-3, "check": 100},
+    {"name": "normal blotto 10/4", "game": "blotto", "params": [10, 4], "trainer": "normal",
+     "iters": 5000, "target": 1e-2, "check": 100},
+    {"name": "normal blotto 12/5", "game": "blotto", "params": [12, 5], "trainer": "normal",
+     "iters": 1000, "target": 5e-2, "check": 100},
+    {"name": "kuhn recursive", "game": "kuhn", "trainer": "kuhn", "engine": "recursive",
+     "iters": 10**4, "target": 10, "check": 1000},
+    {"name": "kuhn vector", "game": "kuhn", "trainer": "kuhn", "engine": "vector",
+     "iters": 2000, "target": 10, "check": 100},
+    {"name": "dudo 2 recursive", "game": "dudo", "params": [2], "trainer": "dudo", "engine": "recursive",
+     "iters": 360, "target": None},
+    {"name": "dudo 2 vector", "game": "dudo", "params": [2], "trainer": "dudo", "engine": "vector",
+     "iters": 100, "target": 150, "check": 25},
+    {"name": "bitdudo 1v1 vector", "game": "bitdudo", "params": [[1, 1]], "trainer": "game", "engine": "vector",
+     "iters": 100, "target": 150, "check": 25},
+    {"name": "bitdudo 2v1 external", "game": "bitdudo", "params": [[2, 1]], "trainer": "game", "engine": "external",
+     "iters": 500, "target": None},
+    {"name": "bitdudo 2v2 recall 3 external", "game": "bitdudo", "params": [[2, 2], 3], "trainer": "game",
+     "engine": "external", "iters": 500, "target": None},
+]
+
+def engines(iters: int=360, names: list=["recursive", "tree", "iterative", "vector"]) -> dict:
+    """ Measures the deals traversed per second of each dudo_train engine. """
+    # skip the cache so runs neither read nor clobber trained results
+    train = cfr.Trainer.dudo_train.__wrapped__
+    rates = {}
+    for engine in names:
+        trainer = cfr.Trainer("dudo")
+        # an iteration of the vector engine sweeps every deal
+        n = iters//len(trainer.game.deals) if engine == "vector" else iters
+        start = time.perf_counter()
+        train(trainer, n, engine)
+        rates[engine] = iters/(time.perf_counter() - start)
+    return rates
+
+def scaling(iters: int=720, workers: list=[1, 2, 4], engine: str="iterative", params: list=[2]) -> dict:
+    """ Measures the deals traversed per second of parallel dudo_train by number of workers. """
+    train = cfr.Trainer.dudo_train.__wrapped__
+    rates = {}
+    for n in workers:
+        trainer = cfr.Trainer("dudo", *params)
+        start = time.perf_counter()
+        train(trainer, iters, engine, workers=n)
+        rates[n] = iters/(time.perf_counter() - start)
+    return rates
+
+def normal_form(case: dict, game, graph=False):
+    """ Trains a normal form case, returning the metric series if graphed. """
+    if case["trainer"] == "regret":
+        return cfr.Regret(game=game).train(case["iters"], graph=graph)
+    return cfr.train_normal(case["iters"], graph=graph, game=game)
+
+def run(case: dict) -> dict:
+    """ Runs a single case, in its own process. """
+    game = registry.get(case["game"], *case.get("params", []))
+    random.seed(SEED)
+    iters, target = case["iters"], case.get("target")
+
+    if case["trainer"] in ["regret", "normal"]:
+        nodes = game.ACTIONS*(1 if case["trainer"] == "regret" else 2)
+        start = time.perf_counter()
+        normal_form(case, game)
+        elapsed = time.perf_counter() - start
+        # the metrics would slow the timed run, so find the iteration separately
+        reached = None
+        if target is not None:
+            random.seed(SEED)
+            series = normal_form(case, game, metrics.Series(log=False, stride=case["check"]))
+            hits = series.t[series.exploitability <= target]
+            reached = elapsed*hits[0]/iters if len(hits) > 0 else None
+    else:
+        train = getattr(cfr.Trainer, f"{case['trainer']}_train").__wrapped__
+        engine = case["engine"]
+        deals = len(game.deals) if engine == "vector" else 1
+        sampled = engine in ["external", "outcome"]
+        nodes = None if sampled else tree.Tree(game, store.Store(game.ACTIONS)).size*deals
+        start = time.perf_counter()
+        train(cfr.Trainer(game), iters, engine)
+        elapsed = time.perf_counter() - start
+        reached = None
+        if target is not None:
+            trainer = cfr.Trainer(game)
+            random.seed(SEED)
+            start = time.perf_counter()
+            train(trainer, iters, engine, target=target, check=case["check"])
+            if trainer.exploitability() <= target:
+                reached = time.perf_counter() - start
+
+    return {
+        "iterations/sec": iters/elapsed,
+        "nodes/sec": None if nodes is None else nodes*iters/elapsed,
+        "peak memory MB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,
+        "time to target s": reached,
+    }
+
+def suite(cases: list=CASES) -> dict:
+    """ Runs every case, each in a freshly spawned process. """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with context.Pool(1) as pool:
+            results[case["name"]] = pool.apply(run, (case,))
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float=TOLERANCE) -> list:
+    """ Gets a description of every regression of the results from the baseline. """
+    regressions = []
+    for name, result in results.items():
+        for metric, value in result.items():
+            old = baseline.get(name, {}).get(metric)
+            if old is None or value is None:
+                if old is not None and metric == "time to target s":
+                    regressions.append(f"{name}: no longer reaches the target")
+                continue
+            # rates should not drop, costs should not grow
+            if metric.endswith("/sec"):
+                worse = value < old*(1 - tolerance)
+            else:
+                worse = value > old*(1 + tolerance) + (SLACK if metric.endswith(" s") else 0)
+            if worse:
+                regressions.append(f"{name}: {metric} {value:.4g}, was {old:.4g}")
+    return regressions
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "engines":
+        rates = engines()
+        for engine, rate in rates.items():
+            print(f"{engine: <10} {rate:8.1f} deals/sec {rate/rates['recursive']:6.1f}x")
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "scaling":
+        rates = scaling()
+        for n, rate in rates.items():
+            print(f"{n: >2} workers {rate:8.1f} deals/sec {rate/rates[1]:6.2f}x on {os.cpu_count()} cores")
+        sys.exit()
+
+    results = suite()
+    for name, result in results.items():
+        reached = result["time to target s"]
+        rate = result["nodes/sec"]
+        print(f"{name: <30} {result['iterations/sec']:10.1f} iters/sec {'-' if rate is None else f'{rate:.4g}': >12} nodes/sec "
+              f"{result['peak memory MB']:7.1f} MB  target {'-' if reached is None else f'{reached:.2f}s'}")
+    path = BASELINE if len(sys.argv) > 1 and sys.argv[1] == "baseline" else RESULTS
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4)
+
+    if path == RESULTS and os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            regressions = compare(results, json.load(f))
+        for regression in regressions:
+            print(f"regression: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -1,47 +1,250 @@
 # maintains methods for caching purposes
-import pickle, functools, os
-try:
-    from scipy.stats import entropy
-    import matplotlib.pyplot as plt
-except ModuleNotFoundError:
-    print("Scientific libraries not found, some functionality may be broken...")
+import pickle, functools, glob, hashlib, inspect, os, random
+import numpy as np
+import store, mapped, metrics, checkpoint
+"""
+an entry is keyed on the function, its arguments with defaults filled in, the
+parameters of the game, the state of the random number generator and the
+version of the code, so a cached result is only ever returned for the exact
+call that made it. entries are named
 
-def get_name(f) -> str:
-    """ Makes a filename for a given function. """
-    return f"{NAME}_{f.__qualname__}.pickle"
+    {game}_{function}_{family}_{iters}.{pickle, strategy, checkpoint}
 
-def load(f):
-    """ Gets the cached file given a function. """
-    with open(get_name(f), "rb") as f:
-        return pickle.load(f)
+where the game is that of the trainer the function is a method of, or the
+function's module otherwise, and the family covers everything but the number
+of iterations, so a call can warm start from an entry of the same family
+trained for fewer. once an entry is finished, its checkpoint drops the node
+table, which its result already holds and checkpoint.read takes from there,
+so an entry keeps one copy of it. the least recently used entries are evicted
+once there are more than MAX_ENTRIES or they take up more than MAX_BYTES.
+"""
 
-def cache(overwrite: bool=False):
-    """ Stores the output of a function in a pickle file. """
+# bump to invalidate every entry, on top of the hash of the source
+VERSION = 1
+DIRECTORY = ".cache"
+MAX_ENTRIES, MAX_BYTES = 64, 1 << 30
+# name of the argument giving the number of iterations
+ITERS = "iters"
+EXTENSIONS = ["strategy", "pickle", "checkpoint"]
+
+source = None
+
+def describe(v) -> str:
+    """ Gets a representation of a value that is stable across runs. """
+    if isinstance(v, (bool, int, float, str, type(None))):
+        return repr(v)
+    if isinstance(v, (list, tuple)):
+        return f"{type(v).__name__}({', '.join(map(describe, v))})"
+    if isinstance(v, dict):
+        return f"dict({', '.join(f'{describe(k)}: {describe(x)}' for k, x in sorted(v.items(), key=repr))})"
+    if isinstance(v, np.ndarray):
+        return f"array({v.dtype}, {v.shape}, {hashlib.blake2b(v.tobytes()).hexdigest()})"
+    if callable(v) and hasattr(v, "__qualname__"):
+        return f"{getattr(v, '__module__', '')}.{v.__qualname__}"
+    if hasattr(v, "__dict__"):
+        return f"{type(v).__qualname__}({describe(vars(v))})"
+    return repr(v)
+
+def game_params(game) -> dict:
+    """ Gets the scalar constants of the game, like the number of dice. """
+    if game is None:
+        return {}
+    return {k: v for k, v in vars(game).items() if k.isupper() and
+            isinstance(v, (bool, int, float, str, tuple, list))}
+
+def game_name(f, args: tuple) -> str:
+    """ Gets the name of the game of the trainer a call is a method of, or the function's module. """
+    return args[0].spec[0] if args and hasattr(args[0], "spec") else f.__module__
+
+def code_version() -> str:
+    """ Hashes every source file, so entries do not outlive the code that made them. """
+    global source
+    if source is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.blake2b(str(VERSION).encode())
+        for path in sorted(glob.glob(os.path.join(root, "*.py")) + glob.glob(os.path.join(root, "games", "*.py"))):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        source = h.hexdigest()
+    return source
+
+def key(f, args: tuple, kwargs: dict) -> tuple:
+    """ Gets the family and number of iterations of a call. """
+    call = inspect.signature(f).bind(*args, **kwargs)
+    call.apply_defaults()
+    arguments = dict(call.arguments)
+    iters = arguments.pop(ITERS, None)
+    # a trainer is keyed on its game rather than on its state
+    game = getattr(arguments.pop("self", None), "game", None)
+    family = describe([f.__module__, f.__qualname__, arguments, game_params(game),
+                       random.getstate(), code_version()])
+    return hashlib.blake2b(family.encode(), digest_size=12).hexdigest(), iters
+
+def get_name(f, family: str="", iters: int=None, ext: str="pickle", name: str=None) -> str:
+    """ Makes a filename for a given function, or an entry of it, under the name of its game. """
+    name = name or f.__module__
+    if not family:
+        return f"{name}_{f.__name__}.{ext}"
+    return os.path.join(DIRECTORY, f"{name}_{f.__name__}_{family}_{iters}.{ext}")
+
+def find(stem: str) -> str:
+    """ Gets the existing result file of an entry, preferring binary tables. """
+    for ext in EXTENSIONS[:2]:
+        if os.path.exists(f"{stem}.{ext}"):
+            return f"{stem}.{ext}"
+
+def entries(pattern: str="*") -> dict:
+    """ Gets the files of each entry, keyed by the entry's path without extension. """
+    groups = {}
+    for path in glob.glob(os.path.join(DIRECTORY, f"{pattern}.*")):
+        groups.setdefault(os.path.splitext(path)[0], []).append(path)
+    return groups
+
+def last_used(files: list) -> float:
+    return max(map(os.path.getmtime, files))
+
+def evict(keep: str) -> None:
+    """ Removes least recently used entries until the cache is within its limits. """
+    groups = entries()
+    size = sum(os.path.getsize(path) for files in groups.values() for path in files)
+    for stem in sorted(groups, key=lambda stem: last_used(groups[stem])):
+        if len(groups) <= MAX_ENTRIES and size <= MAX_BYTES:
+            break
+        if stem == keep:
+            continue
+        for path in groups.pop(stem):
+            size -= os.path.getsize(path)
+            os.remove(path)
+
+def finish(stem: str, v, binary: bool) -> None:
+    """ Drops the node table from the checkpoint of a finished entry, naming
+    the result that holds it instead, unless the result keeps no store. """
+    path = f"{stem}.checkpoint"
+    parts = v if isinstance(v, tuple) else (v,)
+    if binary or not os.path.exists(path) or not any(isinstance(x, store.Store) for x in parts):
+        return
+    with open(path, "rb") as fi:
+        state = pickle.load(fi)
+    state["nodes"], state["result"] = None, os.path.basename(f"{stem}.pickle")
+    checkpoint.write(path, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+def warm_start(f, family: str, iters: int, name: str, path: str) -> None:
+    """ Writes the full checkpoint of the longest finished entry of a family
+    with fewer iterations to path. """
+    best, best_iters = None, -1
+    for stem in entries(f"{name}_{f.__name__}_{family}_*"):
+        done = stem.rsplit("_", 1)[1]
+        if done.isdigit() and best_iters < int(done) < iters and find(stem) and os.path.exists(f"{stem}.checkpoint"):
+            best, best_iters = stem, int(done)
+    if best is not None:
+        state = checkpoint.read(f"{best}.checkpoint")
+        state.pop("result", None)
+        checkpoint.write(path, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+def dump(v, path: str, binary: bool=False) -> None:
+    """ Writes a value, putting the first store of the value in a binary table
+    and the rest of the value in its metadata if binary is set. """
+    parts = v if isinstance(v, tuple) else (v,)
+    i = next((i for i, x in enumerate(parts) if isinstance(x, store.Store)), None)
+    if binary and i is not None:
+        rest = parts[:i] + (None,) + parts[i + 1:]
+        mapped.save(path, parts[i], meta={"index": i, "rest": rest, "tuple": isinstance(v, tuple)})
+    else:
+        with open(path, "wb") as fi:
+            pickle.dump(v, fi)
+
+def read(name: str):
+    """ Reads a result file of either format. binary tables are memory-mapped
+    and take the place of the store they were written from. """
+    if not mapped.is_table(name):
+        with open(name, "rb") as fi:
+            return pickle.load(fi)
+    table = mapped.Table(name)
+    # a table saved on its own has no rest of a value to put it back into
+    if table.meta is None:
+        return table
+    parts = list(table.meta["rest"])
+    parts[table.meta["index"]] = table
+    return tuple(parts) if table.meta["tuple"] else parts[0]
+
+def load(f, *args, **kwargs):
+    """ Gets the cached result of a call, or without arguments the most recently
+    used result of the function, falling back to a file from older versions.
+    f may be a method bound to a trainer. """
+    bound = hasattr(f, "__self__")
+    if bound:
+        f, args = f.__func__, (f.__self__,) + args
+    label = game_name(f, args)
+    if args[1 if bound else 0:] or kwargs:
+        name = find(os.path.splitext(get_name(f, *key(f, args, kwargs), name=label))[0])
+    else:
+        groups = {stem: files for stem, files in entries(f"{label}_{f.__name__}_*").items() if find(stem)}
+        name = find(max(groups, key=lambda stem: last_used(groups[stem]))) if groups else None
+        name = name or next(filter(os.path.exists, [get_name(f, ext=ext, name=label) for ext in EXTENSIONS[:2]]), None)
+    if name is None:
+        raise FileNotFoundError(f"no cached result of {f.__qualname__}")
+    return read(name)
+
+def cache(overwrite: bool=False, binary: bool=False, resume: str=None):
+    """ Stores the output of a function in a pickle file, or a memory-mapped
+    strategy table if binary is set. resume names the argument of the function
+    that takes a checkpoint file, which lets an entry continue from the entry
+    of a shorter run and lets an interrupted run pick up where it stopped. """
 
     def decorator(f):
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
-            if not os.path.exists(get_name(f)) or overwrite:
-                v = f(*args, **kwargs)
-                with open(get_name(f), "wb") as fi:
-                    pickle.dump(v, fi)
-                return v
-            return load(f)
+            family, iters = key(f, args, kwargs)
+            label = game_name(f, args)
+            stem = os.path.splitext(get_name(f, family, iters, name=label))[0]
+            name = find(stem)
+            if name is not None and not overwrite:
+                os.utime(name)
+                v = read(name)
+                # a trainer takes over the node table of its cached result
+                return args[0].adopt(v) if args and hasattr(args[0], "adopt") else v
+
+            os.makedirs(DIRECTORY, exist_ok=True)
+            # the entry keeps a checkpoint unless the caller gives its own
+            checkpointed = resume is not None and resume not in kwargs
+            if checkpointed:
+                checkpoint = f"{stem}.checkpoint"
+                if overwrite and os.path.exists(checkpoint):
+                    os.remove(checkpoint)
+                if not overwrite and not os.path.exists(checkpoint):
+                    warm_start(f, family, iters, label, checkpoint)
+                kwargs = {**kwargs, resume: checkpoint}
+            v = f(*args, **kwargs)
+
+            for path in [f"{stem}.{ext}" for ext in EXTENSIONS[:2]]:
+                if os.path.exists(path):
+                    os.remove(path)
+            dump(v, f"{stem}.{'strategy' if binary else 'pickle'}", binary)
+            if checkpointed:
+                finish(stem, v, binary)
+            evict(stem)
+            return v
 
         return wrapper
 
     return decorator
 
 def graph(f):
-    """ Graphs the output of the function. """
+    """ Graphs the output of the function against a reference equilibrium,
+    given as reference or else the most recently cached result of the function,
+    so the function runs once and the curve does not end at its own result. """
 
     @functools.wraps(f)
-    def wrapper(*args, **kwargs):
-        nash = load(f)
+    def wrapper(*args, reference=None, **kwargs):
+        nash = load(f) if reference is None else reference
         # can either be single player or multiple players
         nash = nash[0] if isinstance(nash, tuple) else nash
 
-        plt.plot(list(map(lambda x: entropy(nash, x), f(*args, graph=True, **kwargs))))
+        series = f(*args, graph=metrics.Series(reference=nash), **kwargs)
+        # plotting is slow to import, so only when graphing
+        import matplotlib.pyplot as plt
+        plt.plot(series.t, series.kl)
+        plt.xscale("log")
         plt.title("Loss over time")
         plt.ylabel("KL divergence between Nash equilibrium and strategy")
         plt.xlabel("Time (iterations)")
@@ -1,6 +1,7 @@
 # main file for the counterfactual regret minimization algorithm
-import random
-import cache, play
+import functools, random, os
+import numpy as np
+import cache, play, store, matching, normal, tree, rules, parallel, checkpoint, metrics, sampling, prune, registry, policy
 """
 0 - first player
 1 - second player
@@ -11,305 +12,554 @@ should implement:
     - ACTIONS: the number of actions
     - actions: the string interpretation of a given action
     -    util: the util for each possible action given an opponent action
+
+games are loaded through the registry, and every trainer carries its own game
+and node table, so trainers of several games or parameterizations can run
+side by side. the module-level game, ACTIONS, nodes and trainer methods are
+those of a default trainer, which set_game replaces.
 """
-import games.dudo as game
-
-ACTIONS = game.ACTIONS
-# set the cache name to the name of the game
-cache.NAME = game.__name__.split(".")[-1]
-
-def get_action(strategy: list) -> int:
-    """ Gets a random action according to the mixed-strategy distribution. """
-    r = random.random()
-    a = cum_prob = 0
-    while a < ACTIONS - 1:
-        cum_prob += strategy[a]
-        if r < cum_prob:
-            break
-        a += 1
-    return a
-
-# expose methods
-play.game, play.get_action, play.ACTIONS = game, get_action, ACTIONS
+
+# binary search over the cumulative strategy, fixed strategies use sampling.Sampler
+get_action = sampling.get_action
 
 class Regret:
 
     """ Represents a strategy. """
 
-    def __init__(self):
-        self.regret_sum = [0]*ACTIONS
-        self.strategy = [0]*ACTIONS
-        self.strategy_sum =[0]*ACTIONS
+    def __init__(self, rule: rules.Vanilla=None, game=None):
+        self.game = trainer.game if game is None else game
+        self.regret_sum = np.zeros(self.game.ACTIONS)
+        self.strategy = np.zeros(self.game.ACTIONS)
+        self.strategy_sum = np.zeros(self.game.ACTIONS)
+        self.rule = rules.Vanilla() if rule is None else rule
+        self.t = 1
 
     def get_strategy(self, realization_weight: float=1) -> list:
         """ Gets the current mixed strategy through regret-matching.
             TODO: try softmax instead of positive scaling """
-        self.strategy = [max(self.regret_sum[a], 0) for a in range(ACTIONS)]
-        norm_sum = sum(self.strategy)
-
-        for a in range(ACTIONS):
-            if norm_sum > 0:
-                self.strategy[a] /= norm_sum
-            else:
-                # uniform strategy
-                self.strategy[a] = 1/ACTIONS
-            self.strategy_sum[a] += realization_weight*self.strategy[a]
+        matching.regret_matching(self.regret_sum, out=self.strategy)
+        matching.accumulate_strategy(self.strategy_sum, self.strategy, realization_weight*self.rule.weight(self.t))
+        return self.strategy.tolist()
 
-        return self.strategy
+    def step(self) -> None:
+        """ Ends an iteration, applying the update rule to the accumulated sums. """
+        self.rule.update(self.regret_sum, self.strategy_sum, self.t)
+        self.t += 1
 
     def get_average_strategy(self) -> list:
         """ Gets the average mixed strategy across all training iterations. """
-        norm_sum = sum(self.strategy_sum)
-        return [self.strategy_sum[a]/norm_sum for a in range(ACTIONS)]
+        return (self.strategy_sum/self.strategy_sum.sum()).tolist()
 
     def regret(self, action_util: list, my_util: float, realization_weight: float=1) -> None:
         """ Updates regret based upon an utility list and the current utility. """
-        # Accumulate action regrets
-        for a in range(ACTIONS):
-            regret = action_util[a] - my_util
-            self.regret_sum[a] += realization_weight*regret
+        matching.accumulate_regret(self.regret_sum, np.asarray(action_util), my_util, realization_weight)
 
     # @cache.graph
     # @cache.cache(overwrite=False)
-    def train(self, iters: int, graph: bool=False) -> list:
-        """ Trains the CFR minimization again a known opponenet strategy. """
-        if graph: rtn = []
+    def train(self, iters: int, graph: bool=False, sampled: bool=False) -> list:
+        """ Trains the CFR minimization again a known opponenet strategy.
+        unless sampled, regrets are taken against the full expected utility.
+        graph is a metrics.Series, or True for the default one, which gets the
+        exploitability of the average strategy and is returned instead. """
+        series = metrics.Series() if graph is True else graph or None
+        game = self.game
+        expected = normal.expected_util(game, game.OPP_STRATEGY)
+        if sampled:
+            opponent = sampling.Sampler(game.OPP_STRATEGY)
+        else:
+            action_util = expected
 
         for i in range(iters):
-            # Compute action utilities
-            action_util = game.util(get_action(game.OPP_STRATEGY))
-            # Get regret-matched mixed-strategy actions
-            self.regret(action_util, action_util[get_action(self.get_strategy())])
+            if sampled:
+                # Compute action utilities
+                action_util = game.util(opponent.draw())
+                # Get regret-matched mixed-strategy actions
+                self.regret(action_util, action_util[get_action(self.get_strategy())])
+            else:
+                self.regret(action_util, action_util @ self.get_strategy())
+            self.step()
 
-            if graph: rtn.append(self.get_average_strategy())
+            if series is not None and series.due(i + 1):
+                strategy = self.get_average_strategy()
+                series.record(i + 1, strategy, metrics.gap(expected, strategy))
 
-        return rtn if graph else self.get_average_strategy()
+        return series if series is not None else self.get_average_strategy()
 
 # @cache.graph
 # @cache.cache(overwrite=True)
-def train_normal(iters: int, graph: bool=False) -> list:
-    """ Calculates the Nash equilibrium for a normal form game. """
-    if graph: rtn = []
-    p1, p2 = Regret(), Regret()
+def train_normal(iters: int, graph: bool=False, sampled: bool=False, rule: rules.Vanilla=None,
+                 game=None) -> list:
+    """ Calculates the Nash equilibrium for a normal form game.
+    unless sampled, both players regret-match against each other's full mixed
+    strategy with matrix-vector products over the payoff matrix. graph is a
+    metrics.Series, or True for the default one, which gets the first player's
+    average strategy and the exploitability of both and is returned instead.
+    the game is the default trainer's unless given. """
+    series = metrics.Series() if graph is True else graph or None
+    game = trainer.game if game is None else game
+    p1, p2 = Regret(rule, game), Regret(rule, game)
+    alternate = p1.rule.alternate
 
     for i in range(iters):
-        a1 = get_action(p1.get_strategy())
-        a2 = get_action(p2.get_strategy())
-
-        p1.regret(game.util(a2), game.util(a2)[a1])
-        p2.regret(game.util(a1), game.util(a1)[a2])
-
-        if graph: rtn.append(p1.get_average_strategy())
-
-    return rtn if graph else (p1.get_average_strategy(), p2.get_average_strategy())
+        if sampled:
+            a1 = get_action(p1.get_strategy())
+            a2 = get_action(p2.get_strategy())
+
+            p1.regret(game.util(a2), game.util(a2)[a1])
+            p2.regret(game.util(a1), game.util(a1)[a2])
+        else:
+            s1, s2 = p1.get_strategy(), p2.get_strategy()
+            util1, util2 = normal.product(game, s2), normal.product(game, s1)
+
+            if not alternate or i % 2 == 0:
+                p1.regret(util1, util1 @ s1)
+            if not alternate or i % 2 == 1:
+                p2.regret(util2, util2 @ s2)
+        p1.step()
+        p2.step()
+
+        if series is not None and series.due(i + 1):
+            s1, s2 = p1.get_average_strategy(), p2.get_average_strategy()
+            # each player's best response gain, the game being symmetric
+            gaps = metrics.gap(normal.product(game, s2), s1) + metrics.gap(normal.product(game, s1), s2)
+            series.record(i + 1, s1, gaps/2)
+
+    return series if series is not None else (p1.get_average_strategy(), p2.get_average_strategy())
 
 ### non-normal-form games
 
-nodes = {}
-
-class Node(Regret):
-
-    """ Information set node class definition. """
-
-    def __init__(self, info_set: list) -> None:
-        super().__init__()
-        self.info_set = info_set
-
-    def __str__(self) -> str:
-        """ Gets the information set string representation. """
-        return f"{self.info_set: <3}: {list(map(lambda x: round(x, 3), self.get_average_strategy()))}"
-
-### kuhn-poker specific
-
-def kuhn_cfr(info: list, history: list=[], p0: float=1, p1: float=1) -> float:
-    """ Counterfactual regret minimzation iteration. """
-    player = len(history) % 2
-
-    # Return payoff for terminal states
-    util = game.util(info, history)
-    if util is not None:
+# probability of exploring uniformly at the updating player's nodes in outcome sampling
+EXPLORE = 0.6
+
+class Trainer:
+
+    """ Trains a game of its own in a node table of its own. """
+
+    def __init__(self, game="dudo", *params) -> None:
+        # a registered name is only loaded once the game is first used
+        self.spec = (game, params) if isinstance(game, str) else registry.spec(game)
+        if not isinstance(game, str):
+            self.game = game
+        # pruning of the running recursive traversal, set by extensive_train
+        self.pruner = None
+
+    @functools.cached_property
+    def game(self):
+        name, params = self.spec
+        return registry.get(name, *params)
+
+    @functools.cached_property
+    def ACTIONS(self) -> int:
+        return self.game.ACTIONS
+
+    @functools.cached_property
+    def nodes(self) -> store.Store:
+        return store.Store(self.ACTIONS)
+
+    def __getstate__(self) -> dict:
+        # modules cannot be pickled, the spec gets the game back
+        return {k: v for k, v in vars(self).items() if k != "game"}
+
+    def adopt(self, result: tuple) -> tuple:
+        """ Takes over the node table of a cached result of a training method.
+        a result cached as a binary table only holds strategies, so it is
+        returned as it is and the trainer's nodes are left alone. """
+        nodes, util = result
+        if not isinstance(nodes, store.Store):
+            return result
+        self.nodes.replace(nodes)
+        return self.nodes, util
+
+    def require(self, name: str, use: str) -> None:
+        """ Raises if the trainer's game is not the one a game-specific method is written for. """
+        if self.spec[0] != name:
+            raise ValueError(f"{use} is written for {name}, not {self.spec[0]}")
+
+    def get_node(self, info: int, history: list) -> store.Node:
+        """ Gets the information set node or creates it if nonexistant. """
+        repr = self.game.hash_info_set(info, history)
+        if repr not in self.nodes:
+            actions = self.game.legal(history)
+            self.nodes.add(repr, self.game.format_info_set(info, history), actions.start, actions.stop)
+        return self.nodes[repr]
+
+    ### monte carlo cfr
+
+    def terminal_util(self, info: list, history: list, player: int) -> float:
+        """ Returns the util of a terminal state for player, None if not terminal. """
+        util = self.game.util(info, history)
+        if util is not None and self.game.get_player(history) != player:
+            return -util
         return util
 
-    info_set = [str(info[player])] + history
-
-    # Get information set node or create it if nonexistant
-    repr = " ".join(info_set)
-    if repr not in nodes:
-        nodes[repr] = Node(repr)
-    node = nodes[repr]
-
-    # For each action, recursively call cfr with additional history and probability
-    strategy = node.get_strategy(p0 if player == 0 else p1)
-    util = [0]*ACTIONS
-    node_util = 0
-
-    for a in range(ACTIONS):
-        next_history = history + [game.actions[a]]
-        # negative because next call's value is from the opponent's perspective
-        util[a] = -(kuhn_cfr(info, next_history, p0*strategy[a], p1) if player == 0 else \
-                    kuhn_cfr(info, next_history, p0, p1*strategy[a]))
-        node_util += strategy[a]*util[a]
-
-    # For each action, compute and accumulate counterfactual regret
-    node.regret(util, node_util, p1 if player == 0 else p0)
-
-    return node_util
-
-@cache.cache(overwrite=False)
-def kuhn_train(iters: int) -> float:
-    """ Calculates the Nash equilibrium. """
-    cards = list(range(1, 4))
-    util = 0
-    for i in range(iters):
-        random.shuffle(cards)
-        util += kuhn_cfr(cards)
-
-    return nodes, util
-
-def kuhn_play(first: int=random.randint(0, 1)) -> float:
-    """ Has a human play againt the computer. """
-    cards = list(range(1, 4))
-    random.shuffle(cards)
-
-    print(f"Your card is {cards[first]}")
-    p = [lambda i: play.get_move(), lambda i: get_action(nodes[i].get_average_strategy())]
-    if first == 1:
-        p = p[::-1]
-
-    history = ""
-    turn = 0
-    while game.util(cards, history) is None:
-        move = game.actions[p[turn](str(cards[turn]) + history)]
-        if turn != first:
-            print(f"Computer plays {move}")
-        history += " " + move
-        turn ^= 1
-
-    print(f"Computer had card {cards[first ^ 1]}")
-    return (1 if len(history) % 2 == first else -1)*game.util(cards, history)
-
-### dudo specific
-
-class DudoRegret:
-
-    """ Represents a strategy. """
-
-    def __init__(self, l):
-        self.regret_sum = [0]*ACTIONS
-        self.strategy = [0]*ACTIONS
-        self.strategy_sum =[0]*ACTIONS
-        self.l = l
-        self.r = ACTIONS if l != 0 else ACTIONS - 1
-
-    def get_strategy(self, realization_weight: float=1) -> list:
-        """ Gets the current mixed strategy through regret-matching.
-            TODO: try softmax instead of positive scaling """
-        self.strategy = [max(self.regret_sum[a], 0) for a in range(ACTIONS)]
-        norm_sum = sum(self.strategy)
+    def external_cfr(self, info: list, history: list, player: int) -> float:
+        """ External sampling iteration updating player, chance and the opponent's
+        actions are sampled while every action of player is explored. """
+        util = self.terminal_util(info, history, player)
+        if util is not None:
+            return util
+
+        current = self.game.get_player(history)
+        node = self.get_node(info[current], history)
+        actions = self.game.legal(history)
+
+        if current != player:
+            # accumulate the opponent's average strategy and sample its action
+            return self.external_cfr(info, self.game.play(history, get_action(node.get_strategy())), player)
+
+        strategy = node.get_strategy(0)
+        util = [0]*self.ACTIONS
+        node_util = 0
+        for a in actions:
+            util[a] = self.external_cfr(info, self.game.play(history, a), player)
+            node_util += strategy[a]*util[a]
 
-        for a in range(self.l, self.r):
-            if norm_sum > 0:
-                self.strategy[a] /= norm_sum
+        # sampled counterfactual values are already weighted by the opponent's reach
+        node.regret(util, node_util)
+        return node_util
+
+    def outcome_cfr(self, info: list, history: list, player: int, pi_opp: float=1, sample: float=1) -> tuple:
+        """ Outcome sampling iteration updating player along a single sampled
+        trajectory. returns the util for player divided by the probability of
+        sampling the terminal state, and the reach probability from this state. """
+        util = self.terminal_util(info, history, player)
+        if util is not None:
+            return util/sample, 1
+
+        current = self.game.get_player(history)
+        node = self.get_node(info[current], history)
+        actions = self.game.legal(history)
+
+        if current != player:
+            # stochastically weighted averaging of the opponent's strategy
+            strategy = node.get_strategy(pi_opp/sample)
+            a = get_action(strategy)
+            util, tail = self.outcome_cfr(info, self.game.play(history, a), player, pi_opp*strategy[a],
+                                          sample*strategy[a])
+            return util, tail*strategy[a]
+
+        strategy = node.get_strategy(0)
+        # explore every legal action with some probability to keep the estimates bounded
+        probs = [0]*self.ACTIONS
+        for a in actions:
+            probs[a] = EXPLORE/len(actions) + (1 - EXPLORE)*strategy[a]
+        a = get_action(probs)
+        util, tail = self.outcome_cfr(info, self.game.play(history, a), player, pi_opp, sample*probs[a])
+
+        # only the sampled action has a nonzero counterfactual value
+        action_util = [0]*self.ACTIONS
+        action_util[a] = util*pi_opp*tail
+        node.regret(action_util, action_util[a]*strategy[a])
+        return util, tail*strategy[a]
+
+    def sampled_cfr(self, i: int, engine: str) -> float:
+        """ Monte carlo cfr iteration on a random deal, alternating the updating
+        player each iteration. returns the sampled util for the first player. """
+        game = self.game
+        info = random.choices(game.deals, game.weights)[0] if hasattr(game, "weights") else random.choice(game.deals)
+        player = i % 2
+        if engine == "external":
+            util = self.external_cfr(info, self.game.root(), player)
+        else:
+            util, _ = self.outcome_cfr(info, self.game.root(), player)
+        return util if player == 0 else -util
+
+    ### extensive-form training
+
+    def exploitability(self, t: tree.Tree=None) -> float:
+        """ Gets the exploitability of the average strategies, in thousandths of a unit per game. """
+        return 1000*(t or tree.Tree(self.game, self.nodes)).exploitability()
+
+    def extensive_train(self, iters: int, engine: str, deal, cfr, rule: rules.Vanilla=None, workers: int=1,
+                        target: float=None, check: int=1000, checkpoint_file: str=None,
+                        checkpoint_every: int=10000, pruning: prune.Pruning=None) -> float:
+        """ Runs the iterations of a trainer, returning the sum of the first player's utils.
+        engine is "recursive" over histories with cfr, or over the compiled game either
+        "tree" recursively, "iterative" without recursion or "vector" over every
+        deal at once, in which case an iteration sweeps all deals. the monte carlo
+        engines "external" and "outcome" sample deals and actions instead.
+        deal gives the deal of each iteration, and rule selects the update rule,
+        which the per-deal engines step once per round of deals.
+        with several workers, the "tree" and "iterative" engines split rounds of
+        deals across processes, checkpointing and checking the target after the
+        rounds passing a multiple of checkpoint_every or check iterations.
+        with a target, training stops early once the exploitability, checked every
+        check iterations, is at most target thousandths of a unit per game.
+        with a checkpoint file, the state is saved every checkpoint_every iterations
+        and at the end, and training resumes from the file if it exists, running
+        only the iterations up to iters that remain. pruning skips subtrees in the
+        "recursive" and "tree" engines of a single process and counts how many,
+        pruning on regrets only with a rule that alternates updates. """
+        self.pruner = pruning
+        start = util = 0
+        if checkpoint_file is not None:
+            saver = checkpoint.Checkpointer(checkpoint_file)
+            if os.path.exists(checkpoint_file):
+                state = checkpoint.load(checkpoint_file)
+                self.nodes.replace(state["nodes"])
+                start, util = state["iteration"], state["util"]
+        if rule is not None:
+            self.nodes.rule = rule
+        if pruning is not None and (engine not in ["recursive", "tree"] or workers > 1):
+            raise ValueError(f"pruning needs the recursive or tree engine in a single process, not {engine!r} with {workers} workers")
+        if pruning is not None and pruning.threshold is not None and not self.nodes.rule.alternate:
+            raise ValueError("regret-based pruning needs a rule with alternating updates")
+        if pruning is not None and pruning.threshold is not None and pruning.spread is None:
+            # a util is at most the largest payoff away from zero either way
+            pruning.spread = 2*np.abs(tree.Tree(self.game, store.Store(self.ACTIONS)).payoff).max()
+        if workers > 1:
+            done = iters
+            # building the tree takes far longer than evaluating on it, so only once
+            t = tree.Tree(self.game, self.nodes)
+
+            def after(before: int, i: int, total: float) -> bool:
+                # rounds span several iterations, so act on every multiple passed
+                nonlocal done
+                if checkpoint_file is not None and i//checkpoint_every > before//checkpoint_every:
+                    saver.save(self.nodes, i, util + total)
+                if target is not None and i//check > before//check and self.exploitability(t) <= target:
+                    done = i
+                    return True
+                return False
+
+            util += parallel.train(self.game, self.nodes, iters, deal, workers, engine, start=start, after=after, t=t)
+            if checkpoint_file is not None:
+                saver.save(self.nodes, done, util)
+                saver.wait()
+            return util
+        if engine in ["tree", "iterative", "vector"] or target is not None:
+            t = tree.Tree(self.game, self.nodes)
+            traverse = {"tree": t.cfr, "iterative": t.iterative_cfr}.get(engine)
+            t.pruning = pruning
+
+        i = start - 1
+        for i in range(start, iters):
+            if pruning is not None:
+                pruning.start(i)
+            if engine == "vector":
+                self.nodes.updating = i % 2 if self.nodes.rule.alternate else None
+                util += t.vector_cfr()
+            elif engine in ["external", "outcome"]:
+                util += self.sampled_cfr(i, engine)
             else:
-                # uniform strategy
-                self.strategy[a] = 1/(self.r - self.l)
-            self.strategy_sum[a] += realization_weight*self.strategy[a]
-
-        return self.strategy
-
-    def get_average_strategy(self) -> list:
-        """ Gets the average mixed strategy across all training iterations. """
-        norm_sum = sum(self.strategy_sum)
-        return [self.strategy_sum[a]/norm_sum for a in range(ACTIONS)]
-
-    def regret(self, action_util: list, my_util: float, realization_weight: float=1) -> None:
-        """ Updates regret based upon an utility list and the current utility. """
-        # Accumulate action regrets
-        for a in range(self.l, self.r):
-            regret = action_util[a] - my_util
-            self.regret_sum[a] += realization_weight*regret
-
-class DudoNode(DudoRegret):
-
-    """ Information set node class definition. """
-
-    def __init__(self, info_set: list, l) -> None:
-        super().__init__(l)
-        self.info_set = info_set
-
-    def __str__(self) -> str:
-        """ Gets the information set string representation. """
-        return f"{self.info_set: <3}: {list(map(lambda x: round(x, 3), self.get_average_strategy()))}"
-
-def dudo_cfr(info: list, history: list=[], p0: float=1, p1: float=1) -> float:
-    """ Counterfactual regret minimzation iteration. """
-    player = game.get_player(history)
-
-    # Return payoff for terminal states
-    util = game.util(info, history)
-    if util is not None:
+                # alternate once per round of deals so every deal updates both players
+                self.nodes.updating = (i//len(self.game.deals)) % 2 if self.nodes.rule.alternate else None
+                if engine == "recursive":
+                    util += cfr(deal(i), self.game.root())
+                else:
+                    util += traverse(t.deal_index[deal(i)])
+            # a round of deals is one iteration of the update rule, as a sweep is for "vector"
+            if engine in ["vector", "external", "outcome"] or (i + 1) % len(self.game.deals) == 0:
+                self.nodes.step()
+
+            if checkpoint_file is not None and (i + 1) % checkpoint_every == 0:
+                saver.save(self.nodes, i + 1, util)
+            if target is not None and (i + 1) % check == 0 and self.exploitability(t) <= target:
+                break
+
+        if checkpoint_file is not None:
+            saver.save(self.nodes, i + 1, util)
+            saver.wait()
         return util
 
-    # Get information set node or create it if nonexistant
-    repr = game.hash_info_set(info[player], history)
-    if repr not in nodes:
-        nodes[repr] = DudoNode(f"{info[player]} {game.format_history(history)}", game.last(history) + 1)
-
-    node = nodes[repr]
-
-    # For each action, recursively call cfr with additional history and probability
-    strategy = node.get_strategy(p0 if player == 0 else p1)
-    util = [0]*ACTIONS
-    node_util = 0
-
-    for a in range(game.last(history) + 1, ACTIONS if sum(history) > 0 else ACTIONS - 1):
-        if not history[a]:
-            next_history = list(history)
-            next_history[a] = True
+    @cache.cache(overwrite=False, resume="checkpoint_file")
+    def game_train(self, iters: int, engine: str="vector", **kwargs) -> float:
+        """ Calculates the Nash equilibrium of the trainer's game with any
+        engine but "recursive", dealing by chance. see extensive_train for the options. """
+        weights = getattr(self.game, "weights", None)
+        deals = self.game.deals
+        return self.nodes, self.extensive_train(iters, engine, lambda i: random.choices(deals, weights)[0], None, **kwargs)
+
+    ### kuhn-poker specific
+
+    def kuhn_cfr(self, info: list, history: list=[], p0: float=1, p1: float=1) -> float:
+        """ Counterfactual regret minimzation iteration. """
+        game, nodes, pruner = self.game, self.nodes, self.pruner
+        player = len(history) % 2
+
+        # Return payoff for terminal states
+        util = game.util(info, history)
+        if util is not None:
+            return util
+
+        info_set = [str(info[player])] + history
+
+        # Get information set node or create it if nonexistant
+        repr = " ".join(info_set)
+        if repr not in nodes:
+            nodes.add(repr, repr)
+        node = nodes[repr]
+
+        # For each action, recursively call cfr with additional history and probability
+        traverser = nodes.updates(player)
+        average = pruner is None or pruner.averages(traverser)
+        strategy = node.get_strategy((p0 if player == 0 else p1) if average else 0)
+        util = [0]*self.ACTIONS
+        node_util = 0
+
+        skipped = []
+        for a in range(self.ACTIONS):
+            q0, q1 = (p0*strategy[a], p1) if player == 0 else (p0, p1*strategy[a])
+            if pruner is not None and pruner.skip(nodes.regret_sum, node.i, a, strategy[a], player, q0, q1, traverser):
+                skipped.append(a)
+                continue
+            next_history = history + [game.actions[a]]
             # negative because next call's value is from the opponent's perspective
-            util[a] = -(dudo_cfr(info, next_history, p0*strategy[a], p1) if player == 0 else \
-                        dudo_cfr(info, next_history, p0, p1*strategy[a]))
+            util[a] = -self.kuhn_cfr(info, next_history, q0, q1)
             node_util += strategy[a]*util[a]
 
-    # For each action, compute and accumulate counterfactual regret
-    node.regret(util, node_util, p1 if player == 0 else p0)
-
-    return node_util
+        # skipped actions are never played, so leave their regrets as they are until caught up
+        for a in skipped:
+            util[a] = node_util
+
+        # For each action, compute and accumulate counterfactual regret
+        if traverser:
+            node.regret(util, node_util, p1 if player == 0 else p0)
+            if pruner is not None:
+                pruner.catch_up(nodes.regret_sum, node.i, util, node_util)
+
+        return node_util
+
+    @cache.cache(overwrite=False, resume="checkpoint_file")
+    def kuhn_train(self, iters: int, engine: str="recursive", **kwargs) -> float:
+        """ Calculates the Nash equilibrium, see extensive_train for the options.
+        generalized kuhn poker like nkuhn needs an engine over the compiled game. """
+        if engine == "recursive":
+            self.require("kuhn", "the recursive engine of kuhn_train")
+
+        deals, rounds = [tuple(d) for d in self.game.deals], {}
+
+        def deal(i: int) -> tuple:
+            # every deal once per round, as the update rule steps once per round, in an
+            # order only depending on the round so a resumed run deals the same
+            r = i//len(deals)
+            if r not in rounds:
+                rounds.clear()
+                rounds[r] = random.Random(r).sample(deals, len(deals))
+            return rounds[r][i % len(deals)]
+
+        return self.nodes, self.extensive_train(iters, engine, deal, self.kuhn_cfr, **kwargs)
+
+    def kuhn_play(self, first: int=random.randint(0, 1)) -> float:
+        """ Has a human play againt the computer. """
+        self.require("kuhn", "kuhn_play")
+        cards = list(self.game.privates)
+        random.shuffle(cards)
 
-@cache.cache(overwrite=True)
-def dudo_train(iters: int) -> float:
-    """ Calculates the Nash equilibrium. """
-    util = 0
-    poss = [(i, j) for i in range(1, 7) for j in range(1, 7)]
-    for i in range(iters):
-        # util += dudo_cfr([random.randrange(1, 7), random.randrange(1, 7)], [False]*ACTIONS)
-        util += dudo_cfr(poss[i % len(poss)], [False]*ACTIONS)
-
-    return nodes, util
-
-def dudo_play(first: int=random.randint(0, 1)) -> float:
-    """ Has a human play againt the computer. """
-    rolls = [random.randrange(1, 7), random.randrange(1, 7)]
-
-    print(f"Your roll is {rolls[first]}")
-    # p = [lambda i: play.get_move(), lambda i: get_action(nodes[i].get_average_strategy())]
-    p = [lambda i: get_action(nodes[i].get_average_strategy())]*2
-    if first == 1:
-        p = p[::-1]
-
-    history = [False]*ACTIONS
-    turn = 0
-    while game.util(rolls, history) is None:
-        move = p[turn](game.hash_info_set(rolls[turn], history))
-        print(game.last(history), "|", nodes[game.hash_info_set(rolls[turn], history)])
-        # print(game.last(history))
-        if turn != first:
-            print(f"Computer plays {game.actions[move]}")
-        history[move] = True
-        turn ^= 1
-
-    print(f"Computer had roll {rolls[first ^ 1]}")
-    return (1 if turn == first else -1)*game.util(rolls, history)
+        print(f"Your card is {cards[first]}")
+        p = [lambda i: play.get_move(self.game), policy.Policy(self.nodes)]
+        if first == 1:
+            p = p[::-1]
+
+        history = ""
+        turn = 0
+        while self.game.util(cards, history) is None:
+            move = self.game.actions[p[turn](str(cards[turn]) + history)]
+            if turn != first:
+                print(f"Computer plays {move}")
+            history += " " + move
+            turn ^= 1
+
+        print(f"Computer had card {cards[first ^ 1]}")
+        return (1 if len(history) % 2 == first else -1)*self.game.util(cards, history)
+
+    ### dudo specific
+
+    def dudo_cfr(self, info: list, history: list=[], p0: float=1, p1: float=1) -> float:
+        """ Counterfactual regret minimzation iteration. """
+        game, nodes, pruner = self.game, self.nodes, self.pruner
+        player = game.get_player(history)
+
+        # Return payoff for terminal states
+        util = game.util(info, history)
+        if util is not None:
+            return util
+
+        # Get information set node or create it if nonexistant
+        repr = game.hash_info_set(info[player], history)
+        if repr not in nodes:
+            l = game.last(history) + 1
+            nodes.add(repr, f"{info[player]} {game.format_history(history)}", l,
+                      self.ACTIONS if l != 0 else self.ACTIONS - 1)
+
+        node = nodes[repr]
+
+        # For each action, recursively call cfr with additional history and probability
+        traverser = nodes.updates(player)
+        average = pruner is None or pruner.averages(traverser)
+        strategy = node.get_strategy((p0 if player == 0 else p1) if average else 0)
+        util = [0]*self.ACTIONS
+        node_util = 0
+
+        skipped = []
+        for a in range(game.last(history) + 1, self.ACTIONS if sum(history) > 0 else self.ACTIONS - 1):
+            if not history[a]:
+                q0, q1 = (p0*strategy[a], p1) if player == 0 else (p0, p1*strategy[a])
+                if pruner is not None and pruner.skip(nodes.regret_sum, node.i, a, strategy[a], player, q0, q1, traverser):
+                    skipped.append(a)
+                    continue
+                next_history = list(history)
+                next_history[a] = True
+                # negative because next call's value is from the opponent's perspective
+                util[a] = -self.dudo_cfr(info, next_history, q0, q1)
+                node_util += strategy[a]*util[a]
+
+        # skipped actions are never played, so leave their regrets as they are until caught up
+        for a in skipped:
+            util[a] = node_util
+
+        # For each action, compute and accumulate counterfactual regret
+        if traverser:
+            node.regret(util, node_util, p1 if player == 0 else p0)
+            if pruner is not None:
+                pruner.catch_up(nodes.regret_sum, node.i, util, node_util)
+
+        return node_util
+
+    @cache.cache(overwrite=False, resume="checkpoint_file")
+    def dudo_train(self, iters: int, engine: str="recursive", **kwargs) -> float:
+        """ Calculates the Nash equilibrium, see extensive_train for the options. """
+        poss = [(i, j) for i in range(1, 7) for j in range(1, 7)]
+        # util += self.dudo_cfr([random.randrange(1, 7), random.randrange(1, 7)], [False]*self.ACTIONS)
+        return self.nodes, self.extensive_train(iters, engine, lambda i: poss[i % len(poss)], self.dudo_cfr, **kwargs)
+
+    def dudo_play(self, first: int=random.randint(0, 1)) -> float:
+        """ Has a human play againt the computer. """
+        rolls = [random.randrange(1, 7), random.randrange(1, 7)]
+
+        print(f"Your roll is {rolls[first]}")
+        # p = [lambda i: play.get_move(self.game), lambda i: get_action(self.nodes[i].get_average_strategy())]
+        p = [policy.Policy(self.nodes)]*2
+        if first == 1:
+            p = p[::-1]
+
+        history = [False]*self.ACTIONS
+        turn = 0
+        while self.game.util(rolls, history) is None:
+            move = p[turn](self.game.hash_info_set(rolls[turn], history))
+            print(self.game.last(history), "|", self.nodes[self.game.hash_info_set(rolls[turn], history)])
+            # print(self.game.last(history))
+            if turn != first:
+                print(f"Computer plays {self.game.actions[move]}")
+            history[move] = True
+            turn ^= 1
+
+        print(f"Computer had roll {rolls[first ^ 1]}")
+        return (1 if turn == first else -1)*self.game.util(rolls, history)
+
+# the trainer the module-level names act on
+trainer = Trainer()
+
+def set_game(module) -> None:
+    """ Replaces the default trainer by one of a game, starting from an empty node table. """
+    global trainer
+    trainer = Trainer(module)
+
+def __getattr__(name: str):
+    """ Gets the game, ACTIONS, nodes and methods of the default trainer. """
+    if name.startswith("_"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(trainer, name)
 
 if __name__ == "__main__":
     random.seed(7)
@@ -317,31 +567,34 @@ if __name__ == "__main__":
 
     ### normal form games
     # # train against fixed opponent
-    # r = Regret()
+    # trainer = Trainer("rps")
+    # r = Regret(game=trainer.game)
     # print(r.train(iters))
     #
     # # find Nash equilibrium
-    # strategy, _ = train_normal(iters)
+    # strategy, _ = train_normal(iters, game=trainer.game)
     # print(strategy, _)
-    # print(play.format_strategy(strategy))
+    # print(play.format_strategy(strategy, trainer.game))
 
-    # play.game_session(strategy)
+    # play.game_session(strategy, trainer.game)
 
     ### kuhn poker
-    # nodes, util = kuhn_train(iters)
+    # trainer = Trainer("kuhn")
+    # nodes, util = trainer.kuhn_train(iters)
     #
     # print(f"Average game value: {util/iters:.3f}")
     # for n in sorted(map(str, nodes.values())):
     #     print(n)
     #
-    # print(kuhn_play())
+    # print(trainer.kuhn_play())
 
     ### dudo
-    nodes, util = dudo_train(iters)
+    nodes, util = trainer.dudo_train(iters)
 
     print(f"Average game value: {util/iters:.3f}")
+    print(f"Exploitability: {trainer.exploitability():.3f} mbb/g")
     print(len(nodes))
     # for n in sorted(map(str, nodes.values())):
     #     print(n)
 
-    print(dudo_play(0))
+    print(trainer.dudo_play(0))
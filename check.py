@@ -0,0 +1,106 @@
+# regression checks of the engines against each other and known results
+import sys
+import numpy as np
+import cfr, store, tree, registry
+"""
+every check raises an AssertionError once an engine drifts from its
+reference, and they all run with
+
+    python check.py
+
+or only those named on the command line. the engines over the compiled game
+reproduce the sums of the recursive engine, up to the rounding of adding in
+another order, which the iterative engine does. the vector engine updates
+once per sweep of every deal, which is a round of the per-deal engine where
+every deal starts from the same regrets and its updates count by its chance.
+"""
+
+# kuhn poker's equilibrium where the first player never bets first, as the
+# probability of betting in every information set
+KUHN_NASH = {"1": 0, "2": 0, "3": 0, "1 p b": 0, "2 p b": 1/3, "3 p b": 1,
+             "1 p": 1/3, "2 p": 0, "3 p": 1, "1 b": 0, "2 b": 1/3, "3 b": 1}
+
+# largest difference of a regret or strategy sum from its reference, the
+# sums of a few rounds of dudo being at most in the tens
+TOLERANCE = 1e-14
+# deals dudo is trained on, two rounds of every deal
+ITERS = 72
+
+def dudo(engine: str, iters: int=ITERS) -> store.Store:
+    """ Gets the node table of dudo trained with an engine, bypassing the cache. """
+    trainer = cfr.Trainer("dudo")
+    cfr.Trainer.dudo_train.__wrapped__(trainer, iters, engine)
+    return trainer.nodes
+
+def difference(nodes: store.Store, reference: store.Store) -> float:
+    """ Gets the largest difference of the sums of two node tables, matching rows by key. """
+    keys = list(reference.ids)
+    assert len(keys) == nodes.size, "the tables have different information sets"
+    rows, ref = [nodes.ids[key] for key in keys], [reference.ids[key] for key in keys]
+    return max(np.abs(nodes.regret_sum[rows] - reference.regret_sum[ref]).max(),
+               np.abs(nodes.strategy_sum[rows] - reference.strategy_sum[ref]).max())
+
+def check_engines() -> None:
+    """ The tree and iterative engines match the recursive engine on dudo. """
+    baseline = dudo("recursive")
+    for engine in ["tree", "iterative"]:
+        error = difference(dudo(engine), baseline)
+        assert error <= TOLERANCE, f"{engine} is {error:.3g} from the recursive engine"
+
+def check_vector(sweeps: int=3) -> None:
+    """ The vector engine matches rounds of the tree engine on dudo. """
+    game = cfr.Trainer("dudo").game
+    nodes, reference = store.Store(game.ACTIONS), store.Store(game.ACTIONS)
+    t, per_deal = tree.Tree(game, nodes), tree.Tree(game, reference)
+    for _ in range(sweeps):
+        t.vector_cfr()
+        regret_sum = reference.regret_sum.copy()
+        regrets, strategies = np.zeros_like(regret_sum), np.zeros_like(regret_sum)
+        for deal, weight in enumerate(per_deal.weights):
+            reference.regret_sum[:], strategy_sum = regret_sum, reference.strategy_sum.copy()
+            per_deal.cfr(deal)
+            regrets += weight*(reference.regret_sum - regret_sum)
+            # an information set is in a deal for every private of the opponent
+            strategies += weight*per_deal.privates*(reference.strategy_sum - strategy_sum)
+            reference.strategy_sum[:] = strategy_sum
+        reference.regret_sum[:] = regret_sum + regrets
+        reference.strategy_sum += strategies
+        nodes.step()
+        reference.step()
+    error = difference(nodes, reference)
+    assert error <= TOLERANCE, f"vector is {error:.3g} from rounds of the tree engine"
+
+def check_nash() -> None:
+    """ The exploitability of kuhn poker's equilibrium is zero, and its value 1/18. """
+    game = cfr.Trainer("kuhn").game
+    nodes = store.Store(game.ACTIONS)
+    t = tree.Tree(game, nodes)
+    for key, bet in KUHN_NASH.items():
+        nodes.strategy_sum[nodes.ids[key]] = [1 - bet, bet]
+    error = t.exploitability()
+    assert abs(error) <= TOLERANCE, f"the equilibrium is exploitable by {error:.3g}"
+    # the game is worth 1/18 to the second player
+    value = t.best_response(1)
+    assert abs(value - 1/18) <= TOLERANCE, f"the second player's best response gets {value:.17g}"
+
+def check_blotto() -> None:
+    """ Blotto allocations round-trip through their ranks in lexicographic order. """
+    for s, n in [(5, 3), (10, 4), (20, 2)]:
+        game = registry.get("blotto", s, n)
+        allocations = game.unrank(np.arange(game.ACTIONS))
+        listed = list(map(tuple, allocations.tolist()))
+        assert (allocations.sum(axis=1) == s).all() and (allocations >= 0).all(), f"{s}/{n} has invalid allocations"
+        # strictly increasing, so every allocation is there once
+        assert all(a < b for a, b in zip(listed, listed[1:])), f"{s}/{n} is out of order"
+        assert [game.rank(a) for a in allocations] == list(range(game.ACTIONS)), f"{s}/{n} does not round-trip"
+    # too many allocations to list, so only some ranks
+    game = registry.get("blotto", 100, 10)
+    ranks = np.random.default_rng(0).integers(game.ACTIONS, size=1000)
+    assert [game.rank(a) for a in game.unrank(ranks)] == ranks.tolist(), "100/10 does not round-trip"
+
+CHECKS = {name[len("check_"):]: f for name, f in list(globals().items()) if name.startswith("check_")}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or CHECKS:
+        CHECKS[name]()
+        print(f"{name: <14} ok")
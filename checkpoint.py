@@ -0,0 +1,69 @@
+# periodic checkpoints of training state for resuming
+import os, pickle, random, tempfile, threading
+import store
+"""
+a checkpoint is a pickle of the node table, the number of iterations done,
+the sum of the utils and the state of the random number generator. the
+checkpoint of a finished cache entry leaves the node table out and names the
+result file next to it instead, whose first store is the same table, so
+reading any checkpoint gets the full state.
+"""
+
+class Checkpointer:
+
+    """ Writes checkpoints atomically in a background thread. the state is
+    serialized up front, so training only pauses for an in-memory copy. """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.thread = None
+
+    def save(self, nodes, iteration: int, util: float) -> None:
+        """ Checkpoints the node table after the given number of iterations. """
+        data = pickle.dumps({
+            "nodes": nodes,
+            "iteration": iteration,
+            "util": util,
+            "random": random.getstate(),
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        self.wait()
+        self.thread = threading.Thread(target=write, args=(self.path, data))
+        self.thread.start()
+
+    def wait(self) -> None:
+        """ Blocks until the last checkpoint is on disk. """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+def write(path: str, data: bytes) -> None:
+    """ Replaces the file at path with data, never leaving a partial file. """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def read(path: str) -> dict:
+    """ Gets the state of a checkpoint, taking the node table from the result it names if left out. """
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state["nodes"] is None:
+        result = os.path.join(os.path.dirname(path), state.get("result", ""))
+        if not os.path.isfile(result):
+            raise FileNotFoundError(f"{path} leaves out its nodes and the result holding them is gone")
+        with open(result, "rb") as f:
+            value = pickle.load(f)
+        state["nodes"] = next(v for v in (value if isinstance(value, tuple) else (value,)) if isinstance(v, store.Store))
+    return state
+
+def load(path: str) -> dict:
+    """ Gets the state of a checkpoint and restores the random number generator. """
+    state = read(path)
+    random.setstate(state["random"])
+    return state
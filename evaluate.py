@@ -0,0 +1,104 @@
+# headless self-play evaluation of trained policies
+import math, pickle, time
+import numpy as np
+import store, tree, mapped, cache, sampling, checkpoint
+"""
+games are played in batches over the compiled public tree: every game of a
+batch holds its deal and current node, and each step moves all unfinished
+games down one action at once. policies are looked up from a table of
+cumulative strategies for every decision node and private info, built once.
+seats alternate between games, so the results are free of first-move bias.
+"""
+
+# number of games played at once
+BATCH = 1 << 16
+# z-score of the reported confidence interval
+Z = 1.96
+
+def read(policy):
+    """ Gets a strategy table from a store, a table, or the path of a
+    checkpoint or cached training result. """
+    if not isinstance(policy, str):
+        return policy
+    if mapped.is_table(policy):
+        value = cache.read(policy)
+    else:
+        with open(policy, "rb") as f:
+            value = pickle.load(f)
+    if isinstance(value, dict):
+        # a finished entry's checkpoint takes its nodes from the result
+        return checkpoint.read(policy)["nodes"]
+    return next(v for v in (value if isinstance(value, tuple) else (value,))
+                if isinstance(v, (store.Store, mapped.Table)))
+
+def cumulative(t: tree.Tree, policy) -> np.ndarray:
+    """ Gets the cumulative strategy of every decision node and private info,
+    "uniform" for uniformly random play, unknown information sets also uniform. """
+    legal = t.legal/t.legal.sum(axis=1, keepdims=True)
+    rows = np.broadcast_to(legal[:, None, :], (len(t.decisions), t.privates, legal.shape[1])).copy()
+    if policy != "uniform":
+        policy = read(policy)
+        keys = [None]*len(t.nodes)
+        for key, i in t.nodes.ids.items():
+            keys[i] = key
+        strategy = {}
+        for d, n in enumerate(t.decisions):
+            for p in range(t.privates):
+                key = keys[t.infoset[n, p]]
+                if key not in strategy:
+                    strategy[key] = policy[key].get_average_strategy() if key in policy else None
+                if strategy[key] is not None:
+                    rows[d, p] = strategy[key]
+    return np.cumsum(rows, axis=2)
+
+def simulate(t: tree.Tree, policies: list, games: int, rng: np.random.Generator) -> np.ndarray:
+    """ Plays a batch of games of the first policy against the second, returning
+    the first policy's util in each. the first policy sits first in even games. """
+    deal = rng.choice(len(t.deals), size=games, p=t.weights)
+    seat = np.arange(games) % 2
+    n = np.zeros(games, dtype=np.int64)
+    active = np.arange(games)
+    while len(active) > 0:
+        node = n[active]
+        player = t.player[node]
+        private = t.deals[deal[active], player]
+        # the first policy moves when the player to act is in its seat
+        which = (player != seat[active]).astype(np.int64)
+        cum = policies[which, t.decision[node], private]
+        action = np.minimum((rng.random(len(active))[:, None] >= cum).sum(axis=1), t.r[node] - 1)
+        n[active] = t.first[node] + action - t.l[node]
+        active = active[t.player[n[active]] != tree.TERMINAL]
+
+    # payoffs are from the perspective of the mover at the terminal
+    payoff = t.payoff[n, deal]*np.where(t.mover[n] == seat, 1, -1)
+    return payoff
+
+def evaluate(game, first, second="uniform", games: int=10**6, seed: int=None) -> dict:
+    """ Plays games of the first policy against the second, each a store, a
+    strategy table, the path of a checkpoint or cached result, or "uniform".
+    returns the first policy's mean util, the half-width of its confidence
+    interval and the games played per second. """
+    t = tree.Tree(game, store.Store(game.ACTIONS))
+    policies = np.stack([cumulative(t, first), cumulative(t, second)])
+    rng = np.random.default_rng(seed) if seed is not None else sampling.rng()
+
+    start = time.perf_counter()
+    total = squares = 0
+    for played in range(0, games, BATCH):
+        util = simulate(t, policies, min(BATCH, games - played), rng)
+        total += util.sum()
+        squares += (util**2).sum()
+    elapsed = time.perf_counter() - start
+
+    mean = float(total/games)
+    std = math.sqrt(max(squares/games - mean**2, 0))
+    return {"mean": mean, "ci": Z*std/math.sqrt(games), "games": games, "games/sec": games/elapsed}
+
+if __name__ == "__main__":
+    import cfr
+    nodes, util = cfr.dudo_train(10**2, engine="vector")
+    for opponent in ["uniform", nodes]:
+        result = evaluate(cfr.game, nodes, opponent)
+        name = opponent if isinstance(opponent, str) else "average"
+        print(f"average vs {name: <8} {result['mean']:+.4f} ± {result['ci']:.4f} "
+              f"({result['games/sec']:,.0f} games/sec)")
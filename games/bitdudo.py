@@ -0,0 +1,112 @@
+# dice of each player
+DICE = (1, 1)
+# number of most recent claims an information set remembers, None for all of them
+RECALL = None
+
+from itertools import combinations_with_replacement
+from math import factorial
+"""
+dudo with the claim history as an integer bitmask, bit a set once claim a has
+been made and bit DUDO once dudo is called. claims only ever go up, so the last
+claim is the highest set claim bit and the player to act is the parity of the
+number of set bits, both single operations on the mask. the information set
+key is the claim mask and the player to act times the number of privates plus
+the private info, so it is a shift and a multiply-add of the history.
+
+a player's private info is the sorted tuple of their dice, and deals are
+every pair of them weighted by their probability. with RECALL set, information
+sets only remember the last RECALL claims, the imperfect recall abstraction
+that keeps games with more dice small enough to train.
+"""
+
+def s(n: int, r: int) -> int:
+    """ Computes the strength of a claim n x r. """
+    if r != 1:
+        return 5*n + r + (n >> 1) - 7
+    return 11*n - 6 if n <= (D >> 1) else 5*D + n - 1
+
+def get_player(history: int) -> int:
+    """ Returns the current player given history. """
+    return history.bit_count() & 1
+
+def last(history: int) -> int:
+    """ Returns the index of the last claim, -1 if there is none. """
+    return (history & CLAIMS).bit_length() - 1
+
+def util(rolls: tuple, history: int) -> float:
+    """ Returns the util of a terminal state for the player being doubted,
+    None if state is not terminal. """
+    if not history >> DUDO:
+        return None
+    n, r = claims[last(history)]
+    t = sum(roll.count(1) + (roll.count(r) if r != 1 else 0) for roll in rolls)
+    # guessed exactly right
+    if n == t:
+        return 1
+    return -abs(n - t)
+
+def legal(history: int) -> range:
+    """ Returns the contiguous range of legal actions, dudo only after a claim. """
+    return range(last(history) + 1, ACTIONS if history else ACTIONS - 1)
+
+def play(history: int, action: int) -> int:
+    """ Returns the history after an action is played. """
+    return history | 1 << action
+
+def root() -> int:
+    """ Returns the empty history. """
+    return 0
+
+def recall(history: int) -> int:
+    """ Returns the claims of a history an information set remembers. """
+    history &= CLAIMS
+    if RECALL is None:
+        return history
+    kept = 0
+    for _ in range(RECALL):
+        if not history:
+            break
+        top = 1 << (history.bit_length() - 1)
+        kept |= top
+        history ^= top
+    return kept
+
+def hash_info_set(roll: tuple, history: int) -> int:
+    """ Converts an information set to an unique integer for hashing. the
+    player to act is part of the key, as recalled claims alone may not tell. """
+    return (recall(history) << 1 | get_player(history))*len(privates) + index[roll]
+
+def format_history(history: int) -> str:
+    """ Takes the history of claims and turns it into a string. """
+    return " ".join(actions[a] for a in range(DUDO) if history >> a & 1)
+
+def format_info_set(roll: tuple, history: int) -> str:
+    """ Takes an information set and turns it into a string. """
+    return f"{''.join(map(str, roll))} {format_history(recall(history))}"
+
+def probability(roll: tuple) -> float:
+    """ Returns the probability of rolling a sorted tuple of dice. """
+    ways = factorial(len(roll))
+    for face in set(roll):
+        ways //= factorial(roll.count(face))
+    return ways/6**len(roll)
+
+def setup(dice: tuple=DICE, memory: int=RECALL) -> None:
+    """ Sets the dice of each player and how many claims are remembered. """
+    global DICE, RECALL, D, claims, actions, ACTIONS, DUDO, CLAIMS, privates, index, deals, weights
+    DICE, RECALL = tuple(dice), memory
+    D = sum(DICE)
+    claims = sorted([(n, r) for n in range(1, D + 1) for r in range(1, 7)], key=lambda c: s(*c))
+    actions = ["x".join(map(str, claim)) for claim in claims] + ["dudo"]
+    ACTIONS = len(actions)
+    DUDO = ACTIONS - 1
+    CLAIMS = (1 << DUDO) - 1
+
+    # private information of a player, and every deal with its probability
+    rolls = [list(combinations_with_replacement(range(1, 7), d)) for d in DICE]
+    privates = sorted(set(rolls[0]) | set(rolls[1]), key=lambda roll: (len(roll), roll))
+    index = {roll: i for i, roll in enumerate(privates)}
+    deals = [(a, b) for a in rolls[0] for b in rolls[1]]
+    weights = [probability(a)*probability(b) for a, b in deals]
+
+setup()
@@ -1,34 +1,129 @@
 # number of soldiers, number of battlefields
 S, N = 5, 3
+# number of action pairs scored at once by the payoff kernel
+BLOCK = 1 << 20
 
-def possible_actions(curr: str="", cum_sum: int=0, poss: set=set()) -> list:
-    """ Recursively calculates the list of possible actions. """
-    if len(curr) == N:
-        poss.add(curr)
-        return
+import numpy as np
+from math import comb
+"""
+an action is an allocation of S soldiers over N battlefields, a composition
+of S into N non-negative parts stored as an integer array of length N
 
-    for i in range(S + 1):
-        add = min(i, S - cum_sum)
-        if len(curr) == N - 1:
-            add = S - cum_sum
-        possible_actions(curr + str(add), cum_sum + add, poss)
+actions are indexed by their rank in lexicographic order, so they can be
+converted to and from allocations in closed form without enumerating them
+"""
 
-    return sorted(list(poss))
+def count(s: int, n: int) -> int:
+    """ Number of ways to allocate s soldiers over n battlefields. """
+    return comb(s + n - 1, n - 1) if n > 0 else int(s == 0)
 
-def compare(action1: str, action2: str) -> int:
+def rank(allocation) -> int:
+    """ Returns the lexicographic index of an allocation. """
+    r, left = 0, S
+    for i, c in enumerate(allocation[:-1]):
+        k = N - i - 1
+        # allocations whose part i is smaller than c, by the hockey stick identity
+        r += comb(left + k, k) - comb(left - c + k, k)
+        left -= c
+    return r
+
+def unrank(ranks) -> np.ndarray:
+    """ Returns the allocations for an array of lexicographic indices. """
+    ranks = np.array(ranks, dtype=np.int64, ndmin=1)
+    allocation = np.zeros((len(ranks), N), dtype=np.int64)
+    left = np.full(len(ranks), S, dtype=np.int64)
+    for i in range(N - 1):
+        k = N - i - 1
+        part = np.zeros(len(ranks), dtype=np.int64)
+        done = np.zeros(len(ranks), dtype=bool)
+        # skip past the allocations whose part i is smaller, one value at a time
+        for c in range(S + 1):
+            size = np.where(left >= c, COUNTS[k, np.maximum(left - c, 0)], 0)
+            take = ~done & (ranks >= size) & (c < left)
+            ranks -= np.where(take, size, 0)
+            part += take
+            done |= ~take
+            if done.all():
+                break
+        allocation[:, i] = part
+        left -= part
+    allocation[:, -1] = left
+    return allocation
+
+def compare(action1: np.ndarray, action2: np.ndarray) -> np.ndarray:
     """ Evalutes the number of battlefields won from player 1's perspective. """
-    return sum(int(action1[i]) > int(action2[i]) for i in range(N))
+    return (action1 > action2).sum(axis=-1)
 
-def result(action1: str, action2: str) -> int:
+def result(action1: np.ndarray, action2: np.ndarray) -> np.ndarray:
     """ Returns the final loss for the game. """
-    cap1, cap2 = compare(action1, action2), compare(action2, action1)
-    if cap1 == cap2:
-        return 0
-    return 1 if cap1 > cap2 else -1
+    return np.sign(compare(action1, action2) - compare(action2, action1))
+
+def payoff(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """ Scores every pair of a block of row and column allocations. """
+    return result(rows[:, None, :], cols[None, :, :]).astype(np.float64)
+
+def tiles(size: int=None):
+    """ Streams the payoff matrix as (row offset, column offset, block) tiles. """
+    size = size or max(1, int((BLOCK // N)**0.5))
+    for i in range(0, ACTIONS, size):
+        rows = unrank(np.arange(i, min(i + size, ACTIONS)))
+        for j in range(0, ACTIONS, size):
+            yield i, j, payoff(rows, unrank(np.arange(j, min(j + size, ACTIONS))))
+
+def payoff_matrix() -> np.ndarray:
+    """ Builds the full payoff matrix tile by tile. """
+    matrix = np.empty((ACTIONS, ACTIONS))
+    for i, j, tile in tiles():
+        matrix[i:i + tile.shape[0], j:j + tile.shape[1]] = tile
+    return matrix
 
 def util(opp_action: int) -> list:
     """ Calculates the util list for an opponent action. """
-    return [result(a, actions[opp_action]) for a in actions]
+    opp = unrank(opp_action)
+    return np.concatenate([payoff(unrank(np.arange(i, min(i + BLOCK, ACTIONS))), opp)[:, 0]
+                           for i in range(0, ACTIONS, BLOCK)]).tolist()
+
+class Actions:
+
+    """ Lazy list of the string interpretation of every allocation. """
+
+    @property
+    def sep(self) -> str:
+        return "" if S < 10 else "-"
+
+    def __len__(self) -> int:
+        return ACTIONS
+
+    def __getitem__(self, a: int) -> str:
+        if not 0 <= a < ACTIONS:
+            raise IndexError("action out of range")
+        return self.sep.join(map(str, unrank(a)[0]))
+
+    def __iter__(self):
+        return (self[a] for a in range(ACTIONS))
+
+    def index(self, action: str) -> int:
+        """ Parses an allocation string back into its action index. """
+        try:
+            allocation = [int(c) for c in (action.split(self.sep) if self.sep else action)]
+        except ValueError:
+            raise ValueError(f"{action!r} is not an allocation") from None
+        if len(allocation) != N or sum(allocation) != S or min(allocation) < 0:
+            raise ValueError(f"{action!r} is not an allocation")
+        return rank(allocation)
+
+# counts the setups, so what is derived from the constants elsewhere can tell it is stale
+version = 0
+
+def setup(s: int=S, n: int=N) -> None:
+    """ Sets the number of soldiers and battlefields. """
+    global S, N, ACTIONS, COUNTS, version
+    S, N = s, n
+    version += 1
+    ACTIONS = count(S, N)
+    assert ACTIONS < 1 << 62, "too many allocations to index"
+    # COUNTS[k, m] is the number of ways to allocate m soldiers over k battlefields
+    COUNTS = np.array([[count(m, k) for m in range(S + 1)] for k in range(N + 1)], dtype=np.int64)
 
-actions = possible_actions()
-ACTIONS = len(actions)
+setup()
+actions = Actions()
@@ -0,0 +1,64 @@
+# total money of the class council, money put into the reward, price per can
+MONEY, REWARD, CAN = 100, 100, 1
+# number of HUMs bidding for the reward
+PLAYERS = 2
+
+import numpy as np
+"""
+TJHSST homecoming 2019, see archive/cans.py. the class council splits its
+money between buying cans and a reward, which goes to the HUM that puts in
+the most cans, split on a tie. every HUM loses the cans it puts in, so this is
+an all-pay auction between PLAYERS symmetric players. the council announces
+the reward first, so the auction is solved for each split separately.
+
+an action is the number of cans put in, never more than the reward is worth.
+the expected util of a bid against every other player bidding by a mixed
+strategy with cumulative F and probability p at the bid is the reward times
+
+    sum over ties m of C(n, m) p^m F(bid - 1)^(n - m)/(m + 1)
+        = (F(bid)^N - F(bid - 1)^N)/(N p)
+
+for N players and n = N - 1 opponents, minus the cans put in, which takes a
+single pass over the actions however many players there are.
+"""
+
+def utils(counts: np.ndarray, played: np.ndarray) -> np.ndarray:
+    """ Gets the util of every bid for a player who bid each of played, against
+    the others given by the histogram of every player's bid. """
+    bids = np.flatnonzero(counts)
+    top = bids[-1]
+    # a lone top bidder faces the second highest bid, everyone else the top one
+    second = bids[-2] if len(bids) > 1 else -1
+    alone = (played == top) & (counts[top] == 1)
+    high = np.where(alone, second, top)
+    ties = np.where(high >= 0, counts[np.maximum(high, 0)] - (played == high), 0)
+
+    a = np.arange(ACTIONS)
+    cost = CAN*a
+    high, ties = high[:, None], ties[:, None]
+    return np.where(a < high, -cost, np.where(a == high, REWARD/(ties + 1), REWARD) - cost)
+
+def expected(strategy: np.ndarray) -> np.ndarray:
+    """ Gets the expected util of every bid against every other player bidding by strategy. """
+    p = np.asarray(strategy, dtype=np.float64)
+    F = np.cumsum(p)
+    # F^N - (F - p)^N over N p, without cancellation for a small p
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        share = F**PLAYERS*-np.expm1(PLAYERS*np.log1p(-p/F))/(PLAYERS*p)
+    share = np.where(p > 0, share, F**(PLAYERS - 1))
+    return REWARD*share - CAN*np.arange(ACTIONS)
+
+def cans(strategy: np.ndarray) -> float:
+    """ Gets the expected number of cans collected, bought or put in, if every player bids by strategy. """
+    return (MONEY - REWARD)//CAN + PLAYERS*float(np.asarray(strategy) @ np.arange(ACTIONS))
+
+def setup(players: int=PLAYERS, reward: int=REWARD, money: int=MONEY, can: int=CAN) -> None:
+    """ Sets the number of HUMs and how the council's money is split. """
+    global PLAYERS, REWARD, MONEY, CAN, ACTIONS, actions
+    PLAYERS, REWARD, MONEY, CAN = players, reward, money, can
+    assert 0 <= REWARD <= MONEY
+    # bidding more than the reward is worth always loses money
+    ACTIONS = REWARD//CAN + 1
+    actions = list(map(str, range(ACTIONS)))
+
+setup()
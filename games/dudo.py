@@ -55,10 +55,38 @@ def hash_info_set(roll: int, history: list) -> int:
         n += history[a]
     return n
 
-claims = sorted([(n, r) for n in range(1, D + 1) for r in range(1, 7)], key=lambda c: s(*c))
-actions = ["x".join(map(str, claim)) for claim in claims] + ["dudo"]
-ACTIONS = len(actions)
-DUDO = ACTIONS - 1
+def legal(history: list) -> range:
+    """ Returns the contiguous range of legal actions, dudo only after a claim. """
+    return range(last(history) + 1, ACTIONS if sum(history) > 0 else ACTIONS - 1)
 
-for i, claim in enumerate(claims):
-    assert claim == (num(i), rank(i))
+def play(history: list, action: int) -> list:
+    """ Returns the history after an action is played. """
+    history = list(history)
+    history[action] = True
+    return history
+
+def root() -> list:
+    """ Returns the empty history. """
+    return [False]*ACTIONS
+
+def format_info_set(roll: int, history: list) -> str:
+    """ Takes an information set and turns it into a string. """
+    return f"{roll} {format_history(history)}"
+
+# private information of a player, and every equally likely deal of it
+privates = list(range(1, 7))
+deals = [(i, j) for i in privates for j in privates]
+
+def setup(d: int=D) -> None:
+    """ Sets the total number of dice in play. """
+    global D, claims, actions, ACTIONS, DUDO
+    D = d
+    claims = sorted([(n, r) for n in range(1, D + 1) for r in range(1, 7)], key=lambda c: s(*c))
+    actions = ["x".join(map(str, claim)) for claim in claims] + ["dudo"]
+    ACTIONS = len(actions)
+    DUDO = ACTIONS - 1
+
+    for i, claim in enumerate(claims):
+        assert claim == (num(i), rank(i))
+
+setup()
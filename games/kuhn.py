@@ -16,3 +16,34 @@ def util(cards: list, history: list) -> float:
             return (1 if player_card_higher else -1) if history == "pp" else 1
         elif double_bet:
             return 2 if player_card_higher else -2
+
+### extensive-form interface
+
+CARDS = 3
+# private information of a player, and every equally likely deal of it
+privates = list(range(1, CARDS + 1))
+deals = [(i, j) for i in privates for j in privates if i != j]
+
+def root() -> list:
+    """ Returns the empty history. """
+    return []
+
+def get_player(history: list) -> int:
+    """ Returns the current player given history. """
+    return len(history) % 2
+
+def legal(history: list) -> range:
+    """ Returns the contiguous range of legal actions. """
+    return range(ACTIONS)
+
+def play(history: list, action: int) -> list:
+    """ Returns the history after an action is played. """
+    return history + [actions[action]]
+
+def hash_info_set(card: int, history: list) -> str:
+    """ Converts an information set to its key. """
+    return " ".join([str(card)] + history)
+
+def format_info_set(card: int, history: list) -> str:
+    """ Takes an information set and turns it into a string. """
+    return hash_info_set(card, history)
@@ -0,0 +1,97 @@
+# cards in the deck, betting rounds, buckets the cards are abstracted into (None for none)
+CARDS, ROUNDS, BUCKETS = 3, 1, None
+# chips every player antes, and the size of a bet
+ANTE, STAKE = 1, 1
+
+import abstraction
+"""
+kuhn poker with a deck of CARDS cards and ROUNDS betting rounds, the highest
+card winning at showdown. a round is that of kuhn poker: a player may pass or
+bet, and facing a bet passing folds while betting calls. a round ends once
+both pass or a bet is called, and the player to act is the parity of the
+number of actions so far, so with one round of 3 cards this is kuhn poker.
+
+a history is a tuple of actions, and the information set key is the history
+as a bit string behind a leading one, times the number of buckets, plus the
+bucket of the card. with BUCKETS set, cards are abstracted into that many
+buckets of consecutive cards, bounding the node count whatever the deck size.
+"""
+
+PASS, BET, ACTIONS = range(3)
+actions = ["p", "b"]
+
+def walk(history: tuple) -> tuple:
+    """ Gets the number of finished rounds, the chips each player has put in,
+    and whether the last player to act folded. """
+    chips = [ANTE, ANTE]
+    rounds, bet, passed, folded = 0, False, False, False
+    for i, a in enumerate(history):
+        player = i & 1
+        if a == BET:
+            chips[player] = chips[player ^ 1] + (0 if bet else STAKE)
+            # calling a bet ends the round
+            if bet:
+                rounds, bet, passed = rounds + 1, False, False
+            else:
+                bet = True
+        elif bet:
+            folded = True
+        elif passed:
+            rounds, passed = rounds + 1, False
+        else:
+            passed = True
+    return rounds, chips, folded
+
+def util(cards: tuple, history: tuple) -> float:
+    """ Returns the util of a terminal state for the player to act, None if state is not terminal. """
+    rounds, chips, folded = walk(history)
+    player = len(history) & 1
+    if folded:
+        return chips[player ^ 1]
+    if rounds == ROUNDS:
+        return chips[player] if cards[player] > cards[player ^ 1] else -chips[player]
+
+def root() -> tuple:
+    """ Returns the empty history. """
+    return ()
+
+def get_player(history: tuple) -> int:
+    """ Returns the current player given history. """
+    return len(history) & 1
+
+def legal(history: tuple) -> range:
+    """ Returns the contiguous range of legal actions. """
+    return range(ACTIONS)
+
+def play(history: tuple, action: int) -> tuple:
+    """ Returns the history after an action is played. """
+    return history + (action,)
+
+def hash_info_set(card: int, history: tuple) -> int:
+    """ Converts an information set to an unique integer for hashing. """
+    code = 1
+    for a in history:
+        code = code << 1 | a
+    return code*BUCKETS + bucket[card]
+
+def format_history(history: tuple) -> str:
+    """ Takes a history and turns it into a string. """
+    return "".join(actions[a] for a in history)
+
+def format_info_set(card: int, history: tuple) -> str:
+    """ Takes an information set and turns it into a string. """
+    return f"{labels[bucket[card]]} {format_history(history)}"
+
+def setup(cards: int=CARDS, rounds: int=ROUNDS, buckets: int=BUCKETS) -> None:
+    """ Sets the size of the deck, the number of rounds and of buckets. """
+    global CARDS, ROUNDS, BUCKETS, privates, deals, bucket, labels
+    CARDS, ROUNDS, BUCKETS = cards, rounds, min(buckets or cards, cards)
+    # private information of a player, and every equally likely deal of it
+    privates = list(range(1, CARDS + 1))
+    deals = [(i, j) for i in privates for j in privates if i != j]
+    bucket = abstraction.uniform(privates, BUCKETS)
+    # a bucket is shown as the range of cards in it
+    labels = [f"{min(c)}-{max(c)}" if len(c) > 1 else str(c[0])
+              for c in ([card for card in privates if bucket[card] == b] for b in range(BUCKETS))]
+
+setup()
@@ -0,0 +1,166 @@
+# opt-in counters and timers for the training hot paths
+import collections, contextlib, functools, json, time
+import cfr, store, matching, tree
+"""
+instrumentation patches wrappers over the hot functions while enabled and puts
+the originals back afterwards, so when it is off the traversals run exactly
+the code they always do and pay nothing for it. counters are
+
+    -         visits: nodes visited by a traversal
+    -      terminals: terminal states evaluated by game.util in a traversal
+    -      creations: information sets added to the node table
+    -   hits, misses: lookups in a traversal of information sets already in
+                      the table or not
+    -     iterations: iterations ended by the node table
+
+and phases are timed inclusively, so the time of a phase includes any other
+phase called from inside it: traversal covers a whole traversal, strategy the
+regret-matching of current strategies, regret the regret updates, averaging the
+strategy sum updates and step the update rule applied after every iteration.
+"""
+
+class Stats:
+
+    """ Counters and phase timings of a run. """
+
+    def __init__(self, per_iteration: bool=False) -> None:
+        self.counts = collections.Counter()
+        self.times = collections.Counter()
+        self.calls = collections.Counter()
+        # counters of every iteration, if kept
+        self.per_iteration = [] if per_iteration else None
+        self.last = collections.Counter()
+        self.depth = 0
+        self.start = time.perf_counter()
+
+    def end_iteration(self) -> None:
+        self.counts["iterations"] += 1
+        if self.per_iteration is not None:
+            self.per_iteration.append(dict(self.counts - self.last))
+            self.last = self.counts.copy()
+
+    def summary(self) -> dict:
+        """ Gets the totals, the counts per iteration and the share of the run in each phase. """
+        elapsed = time.perf_counter() - self.start
+        iterations = max(self.counts["iterations"], 1)
+        return {
+            "elapsed": elapsed,
+            "counts": dict(self.counts),
+            "per iteration": {k: v/iterations for k, v in self.counts.items() if k != "iterations"},
+            "times": dict(self.times),
+            "calls": dict(self.calls),
+            "share": {k: v/elapsed for k, v in self.times.items()},
+        }
+
+    def export(self, path: str) -> None:
+        """ Writes the summary, and the counters of every iteration if kept, as json. """
+        with open(path, "w") as f:
+            json.dump({**self.summary(), "iterations": self.per_iteration}, f, indent=4)
+
+# the stats being collected and the originals of every patched function
+stats = None
+patched = []
+
+def patch(owner, name: str, make) -> None:
+    """ Replaces owner.name by make(original), remembering the original. """
+    original = getattr(owner, name)
+    patched.append((owner, name, original))
+    setattr(owner, name, functools.wraps(original)(make(original)))
+
+def timed(phase: str, count: str=None):
+    """ Makes a wrapper timing every call, counting calls under count. """
+    def make(f):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                stats.times[phase] += time.perf_counter() - start
+                stats.calls[phase] += 1
+                if count is not None:
+                    stats.counts[count] += 1
+        return wrapper
+    return make
+
+def traversal(visits=lambda *args: 1):
+    """ Makes a wrapper of a traversal, counting the visits of each call and
+    timing only the outermost call of a recursion. """
+    def make(f):
+        def wrapper(*args, **kwargs):
+            stats.counts["visits"] += visits(*args)
+            if stats.depth > 0:
+                return f(*args, **kwargs)
+            stats.depth += 1
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                stats.depth -= 1
+                stats.times["traversal"] += time.perf_counter() - start
+                stats.calls["traversal"] += 1
+        return wrapper
+    return make
+
+def enable(per_iteration: bool=False, trainer: cfr.Trainer=None) -> Stats:
+    """ Starts collecting stats about the game of a trainer, the default one unless given. """
+    global stats
+    disable()
+    stats = Stats(per_iteration)
+    game = (trainer or cfr.trainer).game
+
+    def util(f):
+        def wrapper(*args):
+            value = f(*args)
+            # building a tree evaluates terminals outside of any traversal
+            if value is not None and stats.depth > 0:
+                stats.counts["terminals"] += 1
+            return value
+        return wrapper
+    patch(game, "util", util)
+    for name in ["last", "hash_info_set", "legal"]:
+        if hasattr(game, name):
+            patch(game, name, timed(name))
+
+    def contains(f):
+        def wrapper(self, key):
+            found = f(self, key)
+            if stats.depth > 0:
+                stats.counts["hits" if found else "misses"] += 1
+            return found
+        return wrapper
+    patch(store.Store, "__contains__", contains)
+    patch(store.Store, "add", timed("creation", "creations"))
+    patch(store.Node, "get_strategy", timed("strategy"))
+    patch(store.Store, "get_strategy", timed("strategy"))
+    patch(matching, "accumulate_regret", timed("regret"))
+    patch(matching, "accumulate_strategy", timed("averaging"))
+
+    def step(f):
+        def wrapper(self):
+            start = time.perf_counter()
+            f(self)
+            stats.times["step"] += time.perf_counter() - start
+            stats.end_iteration()
+        return wrapper
+    patch(store.Store, "step", step)
+
+    for name in ["kuhn_cfr", "dudo_cfr", "external_cfr", "outcome_cfr"]:
+        patch(cfr.Trainer, name, traversal())
+    patch(tree.Tree, "cfr", traversal())
+    patch(tree.Tree, "iterative_cfr", traversal(lambda t, deal: t.size))
+    patch(tree.Tree, "vector_cfr", traversal(lambda t: t.size*len(t.deals)))
+    return stats
+
+def disable() -> None:
+    """ Puts back every original function. """
+    while patched:
+        owner, name, original = patched.pop()
+        setattr(owner, name, original)
+
+@contextlib.contextmanager
+def enabled(per_iteration: bool=False, trainer: cfr.Trainer=None):
+    """ Collects stats within a with block. """
+    try:
+        yield enable(per_iteration, trainer)
+    finally:
+        disable()
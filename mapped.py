@@ -0,0 +1,171 @@
+# binary, memory-mapped tables of trained average strategies
+import hashlib, mmap, pickle, struct
+import numpy as np
+"""
+file layout, every section aligned to 8 bytes:
+    - header: magic, version, float size, key kind, number of info sets,
+              number of actions and the offset of every section
+    -  index: sorted 64-bit key hashes and the row of each
+    -   keys: the string keys of each row, to tell hash collisions apart
+    - labels: the display string of each row
+    - strategies: one row of average strategy per info set
+    -   meta: a pickle of anything stored along with the table
+
+integer keys are their own hash, string keys hash with blake2b. a loaded
+table maps the file, so lookups read straight from the page cache and
+processes serving the same file share its memory.
+"""
+
+MAGIC, VERSION = b"CFRS", 1
+INT, STR = 0, 1
+SECTIONS = ["hashes", "rows", "key_offsets", "key_blob", "label_offsets", "label_blob", "strategies", "meta"]
+HEADER = struct.Struct("<4sHBBQI" + "Q"*(2*len(SECTIONS)))
+
+def hash_key(key) -> int:
+    """ Hashes an info set key to an unsigned 64-bit integer. """
+    if isinstance(key, str):
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    if isinstance(key, (int, np.integer)) and 0 <= key < 1 << 64:
+        return int(key)
+    raise TypeError(f"unsupported info set key {key!r}")
+
+def blob(strings: list) -> tuple:
+    """ Packs strings into offsets and concatenated utf-8 bytes. """
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(s) for s in encoded], dtype=np.uint64)
+    return offsets, b"".join(encoded)
+
+def save(path: str, nodes, dtype=np.float32, meta=None) -> None:
+    """ Writes the average strategies of a store to a binary table. """
+    keys = [None]*len(nodes)
+    for key, i in nodes.ids.items():
+        keys[i] = key
+    kind = STR if keys and isinstance(keys[0], str) else INT
+    hashes = np.array([hash_key(key) for key in keys], dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    key_offsets, key_blob = blob(keys if kind == STR else [])
+    label_offsets, label_blob = blob(nodes.info_sets)
+    sections = {
+        "hashes": hashes[order].tobytes(),
+        "rows": order.astype(np.uint64).tobytes(),
+        "key_offsets": key_offsets.tobytes(),
+        "key_blob": key_blob,
+        "label_offsets": label_offsets.tobytes(),
+        "label_blob": label_blob,
+        "strategies": nodes.get_average_strategy().astype(dtype).tobytes(),
+        "meta": pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL),
+    }
+
+    position, layout = HEADER.size, []
+    for name in SECTIONS:
+        position += -position % 8
+        layout += [position, len(sections[name])]
+        position += len(sections[name])
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, np.dtype(dtype).itemsize, kind, len(keys), nodes.actions, *layout))
+        for name, offset in zip(SECTIONS, layout[::2]):
+            f.write(b"\0"*(offset - f.tell()))
+            f.write(sections[name])
+
+def is_table(path: str) -> bool:
+    """ Whether the file at path is a binary strategy table. """
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class Table:
+
+    """ A read-only strategy table backed by a memory-mapped file. """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, self.kind, self.size, self.actions, *layout = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} strategy table")
+        self.dtype = {4: np.float32, 8: np.float64}[size]
+        self.sections = {name: (layout[2*i], layout[2*i + 1]) for i, name in enumerate(SECTIONS)}
+        self.hashes = self.section("hashes", np.uint64)
+        self.rows = self.section("rows", np.uint64)
+        self.key_offsets = self.section("key_offsets", np.uint64)
+        self.label_offsets = self.section("label_offsets", np.uint64)
+        self.strategies = self.section("strategies", self.dtype).reshape(self.size, self.actions)
+        self.positions = None
+        offset, length = self.sections["meta"]
+        self.meta = pickle.loads(self.buffer[offset:offset + length])
+
+    def section(self, name: str, dtype) -> np.ndarray:
+        """ Gets a zero-copy array view of a section. """
+        offset, length = self.sections[name]
+        return np.frombuffer(self.buffer, dtype=dtype, count=length//np.dtype(dtype).itemsize, offset=offset)
+
+    def string(self, section: str, offsets: np.ndarray, row: int) -> str:
+        """ Decodes the string of a row from a blob section. """
+        start = self.sections[section][0]
+        return self.buffer[start + int(offsets[row]):start + int(offsets[row + 1])].decode()
+
+    def key(self, row: int):
+        """ Gets the info set key of a row. """
+        if self.kind == INT:
+            # integer keys are their hashes, found through the inverse of rows
+            if self.positions is None:
+                self.positions = np.argsort(self.rows)
+            return int(self.hashes[self.positions[row]])
+        return self.string("key_blob", self.key_offsets, row)
+
+    def index(self, key) -> int:
+        """ Gets the row of an info set key, a binary search over the mapped index. """
+        h = np.uint64(hash_key(key))
+        i = int(np.searchsorted(self.hashes, h))
+        while i < self.size and self.hashes[i] == h:
+            row = int(self.rows[i])
+            if self.kind == INT or self.key(row) == key:
+                return row
+            i += 1
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self.index(key)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __getitem__(self, key) -> "Entry":
+        return Entry(self, self.index(key))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return (self.key(row) for row in range(self.size))
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (Entry(self, row) for row in range(self.size))
+
+    def items(self):
+        return ((self.key(row), Entry(self, row)) for row in range(self.size))
+
+class Entry:
+
+    """ Thin view of a single information set row in a table. """
+
+    __slots__ = ("table", "i")
+
+    def __init__(self, table: Table, i: int) -> None:
+        self.table, self.i = table, i
+
+    @property
+    def info_set(self) -> str:
+        return self.table.string("label_blob", self.table.label_offsets, self.i)
+
+    def get_average_strategy(self) -> np.ndarray:
+        """ Gets the stored average mixed strategy. """
+        return self.table.strategies[self.i]
+
+    def __str__(self) -> str:
+        """ Gets the information set string representation. """
+        return f"{self.info_set: <3}: {list(map(lambda x: round(x, 3), self.get_average_strategy().tolist()))}"
@@ -0,0 +1,73 @@
+# numpy backend for regret-matching and regret accumulation
+import numpy as np
+"""
+every function works on the last axis, so the same call handles a single
+information set of shape (ACTIONS,) or a batch of shape (n, ACTIONS)
+
+legal is an optional boolean mask of the same shape marking the actions
+that may be played; illegal actions always get zero probability and regret
+"""
+
+def legal_mask(l: np.ndarray, r: np.ndarray, actions: int) -> np.ndarray:
+    """ Builds the legal action mask for actions in the ranges [l, r). """
+    a = np.arange(actions)
+    return (a >= np.asarray(l)[..., None]) & (a < np.asarray(r)[..., None])
+
+def regret_matching(regret_sum: np.ndarray, legal: np.ndarray=None, out: np.ndarray=None) -> np.ndarray:
+    """ Gets the current mixed strategy from the positive part of the regrets,
+    uniform over the legal actions when no regret is positive. """
+    strategy = np.maximum(regret_sum, 0, out=out)
+    if legal is None and strategy.ndim == 1:
+        # fast path for a single information set
+        norm_sum = strategy.sum()
+        if norm_sum > 0:
+            strategy /= norm_sum
+        else:
+            strategy.fill(1/strategy.shape[0])
+        return strategy
+    if legal is not None:
+        strategy *= legal
+    norm_sum = strategy.sum(axis=-1, keepdims=True)
+    count = legal.sum(axis=-1, keepdims=True) if legal is not None else strategy.shape[-1]
+    positive = norm_sum > 0
+    if positive.all():
+        strategy /= norm_sum
+        return strategy
+    uniform = (legal if legal is not None else 1)/np.maximum(count, 1)
+    np.divide(strategy, np.where(positive, norm_sum, 1), out=strategy)
+    strategy[...] = np.where(positive, strategy, uniform)
+    return strategy
+
+def scatter(total: np.ndarray, ids: np.ndarray, delta: np.ndarray, unique: bool=False) -> None:
+    """ Adds each row of delta to the row of total given by ids. """
+    if unique:
+        total[ids] += delta
+    else:
+        np.add.at(total, ids, delta)
+
+def accumulate_strategy(strategy_sum: np.ndarray, strategy: np.ndarray,
+                        realization_weight=1, ids: np.ndarray=None, unique: bool=False) -> None:
+    """ Adds the weighted strategy to the running strategy sums.
+    with ids, rows of strategy_sum are scattered to and may repeat unless unique. """
+    if ids is None and strategy.ndim == 1:
+        strategy_sum += realization_weight*strategy
+        return
+    delta = np.asarray(realization_weight)[..., None]*strategy
+    if ids is None:
+        strategy_sum += delta
+    else:
+        scatter(strategy_sum, ids, delta, unique)
+
+def accumulate_regret(regret_sum: np.ndarray, action_util: np.ndarray, my_util, realization_weight=1,
+                      legal: np.ndarray=None, ids: np.ndarray=None, unique: bool=False) -> None:
+    """ Adds the weighted counterfactual regret of each action. """
+    if ids is None and legal is None and np.ndim(action_util) == 1:
+        regret_sum += realization_weight*(action_util - my_util)
+        return
+    delta = np.asarray(realization_weight)[..., None]*(action_util - np.asarray(my_util)[..., None])
+    if legal is not None:
+        delta *= legal
+    if ids is None:
+        regret_sum += delta
+    else:
+        scatter(regret_sum, ids, delta, unique)
@@ -0,0 +1,78 @@
+# streaming convergence metrics sampled during training
+import math
+import numpy as np
+"""
+rather than keeping the average strategy of every iteration, a series samples
+a few metrics on a schedule, either every stride iterations or spaced evenly on
+a log scale, and appends them to a file of float64 records with the columns
+below. the average strategy is only normalized at the sampled iterations.
+"""
+
+COLUMNS = ("t", "kl", "exploitability")
+# number of records buffered in memory before they are appended to the file
+BUFFER = 1024
+
+def kl(p: np.ndarray, q: np.ndarray) -> float:
+    """ KL divergence of q from p, infinite where q misses support of p. """
+    p, q = np.asarray(p, dtype=np.float64), np.asarray(q, dtype=np.float64)
+    support = p > 0
+    with np.errstate(divide="ignore"):
+        return float(np.sum(p[support]*np.log(p[support]/q[support])))
+
+def gap(action_util: np.ndarray, strategy) -> float:
+    """ How much a best response gains over a strategy, given the util of each action. """
+    action_util = np.asarray(action_util)
+    return float(action_util.max() - action_util @ np.asarray(strategy))
+
+class Series:
+
+    """ Metrics sampled every stride iterations, or per_decade times every
+    factor of ten when log is set. with a reference strategy, the KL divergence
+    from it is recorded, and records are appended to path if given. """
+
+    def __init__(self, path: str=None, stride: int=1, log: bool=True, per_decade: int=20,
+                 reference=None) -> None:
+        self.path, self.stride, self.log, self.per_decade = path, stride, log, per_decade
+        self.reference = None if reference is None else np.asarray(reference, dtype=np.float64)
+        self.next = 1
+        self.rows, self.written = [], 0
+        if path is not None:
+            open(path, "wb").close()
+
+    def due(self, t: int) -> bool:
+        """ Whether iteration t, counting from 1, is sampled. """
+        return t >= self.next
+
+    def record(self, t: int, strategy, exploitability: float=math.nan) -> None:
+        """ Records the metrics of the average strategy after iteration t. """
+        divergence = math.nan if self.reference is None else kl(self.reference, strategy)
+        self.rows.append((t, divergence, exploitability))
+        if self.log:
+            self.next = max(t + 1, math.ceil(t*10**(1/self.per_decade)))
+        else:
+            self.next = t + self.stride
+        if len(self.rows) >= BUFFER:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Appends the buffered records to the file. """
+        if self.path is not None and self.rows:
+            with open(self.path, "ab") as f:
+                np.array(self.rows, dtype=np.float64).tofile(f)
+            self.written += len(self.rows)
+            self.rows = []
+
+    def data(self) -> np.ndarray:
+        """ Gets every record so far, one row per sample. """
+        self.flush()
+        rows = np.array(self.rows, dtype=np.float64).reshape(-1, len(COLUMNS))
+        return rows if self.path is None else np.concatenate([load(self.path), rows])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name in COLUMNS:
+            return self.data()[:, COLUMNS.index(name)]
+        raise AttributeError(name)
+
+def load(path: str) -> np.ndarray:
+    """ Reads the records of a series file, one row per sample. """
+    return np.fromfile(path, dtype=np.float64).reshape(-1, len(COLUMNS))
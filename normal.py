@@ -0,0 +1,35 @@
+# precomputed payoff matrices for normal form games
+import numpy as np
+
+# largest number of payoff entries that is cached as a dense matrix
+LIMIT = 1 << 24
+matrices = {}
+
+def payoff_matrix(game) -> np.ndarray:
+    """ Gets the matrix M[a, b], the util of playing a against an opponent playing b.
+    built once per game and setup from its util list, unless the game provides its own. """
+    # setup may keep the number of actions, so games whose setup changes the
+    # payoffs count their setups in version
+    key = (game, getattr(game, "version", 0))
+    if key not in matrices:
+        if hasattr(game, "payoff_matrix"):
+            matrix = np.asarray(game.payoff_matrix(), dtype=np.float64)
+        else:
+            matrix = np.array([game.util(b) for b in range(game.ACTIONS)], dtype=np.float64).T
+        matrices[key] = matrix
+    return matrices[key]
+
+def product(game, opp_strategy) -> np.ndarray:
+    """ Multiplies the payoff matrix by a mixed strategy. games too large to
+    cache a dense matrix are streamed through their payoff tiles instead. """
+    opp_strategy = np.asarray(opp_strategy, dtype=np.float64)
+    if game.ACTIONS**2 <= LIMIT or not hasattr(game, "tiles"):
+        return payoff_matrix(game) @ opp_strategy
+    util = np.zeros(game.ACTIONS)
+    for i, j, tile in game.tiles():
+        util[i:i + tile.shape[0]] += tile @ opp_strategy[j:j + tile.shape[1]]
+    return util
+
+def expected_util(game, opp_strategy: list) -> np.ndarray:
+    """ Calculates the expected util of each action against a mixed strategy. """
+    return product(game, opp_strategy)
@@ -0,0 +1,102 @@
+# multi-process training over disjoint deals
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import store, tree, registry
+"""
+training runs in rounds. every worker starts a round from the same snapshot
+of the regrets, held in shared memory, and runs the per-deal engine over its
+own slice of the round's deals. workers write their changes to the regrets
+and strategy sums into their own shared delta buffers, which are merged in
+worker order once everyone is done, so results only depend on the deals and
+the number of workers, never on scheduling.
+"""
+
+# per-process state of a worker, set by init
+state = {}
+
+def attach(name: str, shape: tuple) -> tuple:
+    """ Opens a shared memory block as an array. """
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+def init(spec: tuple, nodes: store.Store, engine: str, names: list, workers: int) -> None:
+    """ Builds the worker's own tree and attaches to the shared arrays. """
+    game = registry.get(spec[0], *spec[1])
+    t = tree.Tree(game, nodes)
+    shape = (nodes.size, nodes.actions)
+    blocks = [attach(names[0], shape)] + [attach(name, (workers,) + shape) for name in names[1:]]
+    state.update(tree=t, nodes=nodes, traverse=t.cfr if engine == "tree" else t.iterative_cfr,
+                 blocks=blocks, regret_sum=blocks[0][1], regret_delta=blocks[1][1],
+                 strategy_delta=blocks[2][1])
+
+def work(args: tuple) -> float:
+    """ Runs a worker's deals for one round against the regret snapshot. """
+    w, deals, t, updating = args
+    nodes, size = state["nodes"], state["nodes"].size
+    snapshot = state["regret_sum"]
+    nodes.regret_sum[:size] = snapshot
+    nodes.strategy_sum[:size] = 0
+    nodes.t, nodes.updating = t, updating
+
+    # the whole round is a single iteration of the update rule
+    util = 0
+    for deal in deals:
+        util += state["traverse"](deal)
+
+    np.subtract(nodes.regret_sum[:size], snapshot, out=state["regret_delta"][w])
+    state["strategy_delta"][w] = nodes.strategy_sum[:size]
+    return util
+
+def train(game, nodes: store.Store, iters: int, deal, workers: int, engine: str="iterative",
+          round_size: int=None, start: int=0, after=None, t: tree.Tree=None) -> float:
+    """ Runs the deals from start up to iters of the "tree" or "iterative" engine
+    split across processes, returning the sum of the first player's utils. deal
+    gives the deal of each iteration and a round, by default one of every deal,
+    is split evenly between workers. rounds stay aligned to multiples of the
+    round size, so a resumed run finishes the round it stopped in. after is
+    called with the iterations done before and after every round and the utils
+    so far, once the nodes are up to date, and stops training if it returns true.
+    t is the compiled tree of the game over the nodes, built if not given. """
+    if engine not in ["tree", "iterative"]:
+        raise ValueError(f"only the tree and iterative engines run in parallel, not {engine!r}")
+    t = t or tree.Tree(game, nodes)
+    round_size = round_size or len(game.deals)
+    size, shape = nodes.size, (nodes.size, nodes.actions)
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, k*8*size*nodes.actions))
+              for k in [1, workers, workers]]
+    regret_sum = np.ndarray(shape, dtype=np.float64, buffer=blocks[0].buf)
+    regret_delta = np.ndarray((workers,) + shape, dtype=np.float64, buffer=blocks[1].buf)
+    strategy_delta = np.ndarray((workers,) + shape, dtype=np.float64, buffer=blocks[2].buf)
+    regret_sum[:] = nodes.regret_sum[:size]
+
+    util = 0
+    try:
+        with multiprocessing.Pool(workers, init, (registry.spec(game), nodes, engine,
+                                                  [block.name for block in blocks], workers)) as pool:
+            for begin in range(start - start % round_size, iters, round_size):
+                first, end = max(begin, start), min(begin + round_size, iters)
+                deals = [t.deal_index[deal(i)] for i in range(first, end)]
+                r = begin//round_size
+                updating = r % 2 if nodes.rule.alternate else None
+                jobs = [(w, deals[w::workers], nodes.t, updating) for w in range(workers)]
+                util += sum(pool.map(work, jobs))
+
+                # merge in worker order so the sums do not depend on scheduling
+                for w in range(workers):
+                    regret_sum += regret_delta[w]
+                    nodes.strategy_sum[:size] += strategy_delta[w]
+                nodes.rule.update(regret_sum, nodes.strategy_sum[:size], nodes.t)
+                nodes.t += 1
+                if after is not None:
+                    nodes.regret_sum[:size] = regret_sum
+                    if after(first, end, util):
+                        break
+    finally:
+        nodes.regret_sum[:size] = regret_sum
+        del regret_sum, regret_delta, strategy_delta
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return util
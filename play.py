@@ -1,7 +1,8 @@
 # library for user interactions
 import random
+import sampling
 
-def format_strategy(strategy: list) -> str:
+def format_strategy(strategy: list, game) -> str:
     """ Formats a strategy. """
     print("\nOptimal strategy:\n" + "-"*10)
     s = []
@@ -9,7 +10,7 @@ def format_strategy(strategy: list) -> str:
         s.append(f"{round(strategy[a], 3): <5} {game.actions[a]}")
     return "\n".join(s)
 
-def get_move() -> int:
+def get_move(game) -> int:
     """ Prompts the user to make a move. """
     while True:
         try:
@@ -19,16 +20,16 @@ def get_move() -> int:
         else:
             return move
 
-def play(strategy: list) -> float:
+def play(strategy: list, game) -> float:
     """ Has a human play against the computer. """
-    move = get_move()
-    opp = get_action(strategy)
+    move = get_move(game)
+    opp = sampling.get_action(strategy)
     print(f"Computer plays: {game.actions[opp]}")
     return game.util(opp)[move]
 
-def game_session(strategy: list) -> None:
+def game_session(strategy: list, game) -> None:
     """ Plays games over and over again. """
-    f = lambda: play(strategy)
+    f = lambda: play(strategy, game)
     util = games = 0
     try:
         while True:
@@ -0,0 +1,53 @@
+# frozen average strategies for answering queries at decision time
+import numpy as np
+import mapped, sampling
+
+class Policy:
+
+    """ Average strategies normalized once into a flat array, one row per
+    information set id, with their cumulative sums for sampling. built from a
+    store, or a memory-mapped table, whose rows are used in place. """
+
+    def __init__(self, nodes, generator: np.random.Generator=None) -> None:
+        if isinstance(nodes, mapped.Table):
+            self.index, self.strategies = nodes.index, nodes.strategies
+        else:
+            self.ids = dict(nodes.ids)
+            self.index = self.ids.__getitem__
+            self.strategies = nodes.get_average_strategy()
+        self.cumulative = np.cumsum(self.strategies, axis=1)
+        self.actions = self.strategies.shape[1]
+        self.rng = generator or sampling.rng()
+
+    def ids_of(self, keys: list) -> np.ndarray:
+        """ Gets the ids of a batch of information set keys. """
+        return np.fromiter(map(self.index, keys), dtype=np.int64, count=len(keys))
+
+    def distribution(self, key) -> np.ndarray:
+        """ Gets the average strategy of an information set. """
+        return self.strategies[self.index(key)]
+
+    def distributions(self, keys: list) -> np.ndarray:
+        """ Gets the average strategies of a batch of information sets. """
+        return self.strategies[self.ids_of(keys)]
+
+    def __call__(self, key) -> int:
+        """ Samples an action of a single information set. """
+        cumulative = self.cumulative[self.index(key)]
+        return min(int(np.searchsorted(cumulative, self.rng.random()*cumulative[-1], side="right")), self.actions - 1)
+
+    def sample(self, keys: list) -> np.ndarray:
+        """ Samples an action of each of a batch of information sets. """
+        cumulative = self.cumulative[self.ids_of(keys)]
+        r = self.rng.random(len(keys))[:, None]*cumulative[:, -1:]
+        return np.minimum((r >= cumulative).sum(axis=1), self.actions - 1)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self.index(key)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.strategies)
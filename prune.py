@@ -0,0 +1,73 @@
+# opt-in pruning of the recursive traversals
+"""
+zero-reach pruning skips a child that neither player reaches. every update
+below it is weighted by a reach that is zero, and its value only counts
+towards its parent with a weight that is zero as well, so it changes nothing.
+
+regret-based pruning skips actions of the player whose regrets are updated
+that regret-matching does not play and whose regret is below a threshold. it
+needs alternating updates, and each player's average strategy is then only
+accumulated on the iterations the player is updated, so below a skipped
+action the opponent neither updates regrets nor accumulates its average and
+the traverser does not reach it. the action's own regret would still have
+changed, by at most its counterfactual reach times the spread of the utils
+on every visit. so an action is only skipped for as long as its regret could
+not have become positive, and once it is traversed again it catches up on
+the regret of the skipped visits from the utils of that traversal. every
+recheck iterations nothing is skipped on regrets.
+"""
+
+class Pruning:
+
+    """ Decides which children a traversal skips and counts them. """
+
+    def __init__(self, zero: bool=True, threshold: float=None, recheck: int=100, spread: float=None) -> None:
+        # spread is the largest difference between two utils, set from the game if not given
+        self.zero, self.threshold, self.recheck, self.spread = zero, threshold, recheck, spread
+        self.active = False
+        self.visited = self.pruned = 0
+        # counterfactual reach of the skipped visits of each action, by row, and
+        # that of the actions traversed again which the row is yet to catch up on
+        self.missed, self.due = {}, {}
+
+    def start(self, i: int) -> None:
+        """ Starts iteration i, without regret-based pruning every recheck iterations. """
+        self.active = self.threshold is not None and i % self.recheck != 0
+
+    def averages(self, traverser: bool) -> bool:
+        """ Whether a player accumulates its average strategy, given whether its regrets are updated. """
+        return traverser or self.threshold is None
+
+    def skip(self, regret_sum, i: int, a: int, probability: float, player: int,
+             p0: float, p1: float, traverser: bool) -> bool:
+        """ Whether to skip the child of action a of row i of the regrets, given
+        the probability of the action, the player to act, the reach of each
+        player at the child and whether the player's regrets are updated. """
+        if self.zero and p0 == 0 and p1 == 0:
+            self.pruned += 1
+            return True
+        if not traverser:
+            self.visited += 1
+            return False
+        missed = self.missed.get(i, {})
+        if self.active and probability == 0 and regret_sum[i, a] < self.threshold:
+            reach = missed.get(a, 0) + (p1 if player == 0 else p0)
+            # only while the regret could not have become positive
+            if regret_sum[i, a] + self.spread*reach < 0:
+                self.missed.setdefault(i, {})[a] = reach
+                self.pruned += 1
+                return True
+        if a in missed:
+            self.due.setdefault(i, {})[a] = missed.pop(a)
+        self.visited += 1
+        return False
+
+    def catch_up(self, regret_sum, i: int, action_util, node_util: float, l: int=0) -> None:
+        """ Adds the regret row i missed on the skipped visits of the actions
+        traversed again, from the utils of this traversal starting at action l. """
+        for a, reach in self.due.pop(i, {}).items():
+            regret_sum[i, a] += reach*(action_util[a - l] - node_util)
+
+    def fraction(self) -> float:
+        """ Gets the fraction of children skipped so far. """
+        return self.pruned/max(self.visited + self.pruned, 1)
@@ -0,0 +1,40 @@
+# lazily loaded games and their parameterizations
+import importlib, importlib.util
+"""
+games are modules keeping their state in globals, which parameterized games
+change in setup. so that several parameterizations can be used side by side,
+every parameterization is loaded as a copy of its module of its own, made the
+first time it is asked for and set up once. the plain module is the instance
+without parameters. a game's spec, its name and parameters, is enough to get
+the same instance in another process, as modules cannot be pickled.
+"""
+
+# module of every registered game, by name
+GAMES = {name: f"games.{name}" for name in ["rps", "blotto", "kuhn", "dudo", "bitdudo", "cans", "nkuhn"]}
+
+# loaded instances, by name and parameters
+instances = {}
+
+def register(name: str, module: str) -> None:
+    """ Registers the module of a game, which is only imported when first used. """
+    GAMES[name] = module
+
+def get(name: str, *params):
+    """ Gets the instance of a game with the given setup parameters, loading it if needed. """
+    key = (name, repr(params))
+    if key not in instances:
+        if not params:
+            game = importlib.import_module(GAMES[name])
+        else:
+            # a fresh copy of the module, so setup leaves every other instance alone
+            found = importlib.util.find_spec(GAMES[name])
+            game = importlib.util.module_from_spec(found)
+            found.loader.exec_module(game)
+            game.setup(*params)
+        game.spec = (name, params)
+        instances[key] = game
+    return instances[key]
+
+def spec(game) -> tuple:
+    """ Gets the name and parameters of a game instance. """
+    return getattr(game, "spec", (game.__name__.split(".")[-1], ()))
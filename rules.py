@@ -0,0 +1,61 @@
+# update rules for the variants of counterfactual regret minimization
+import numpy as np
+"""
+a rule decides how much each iteration's current strategy counts towards the
+average strategy, and how the accumulated sums are adjusted after every
+iteration. iterations are numbered from 1.
+"""
+
+class Vanilla:
+
+    """ Regret-matching with every iteration weighted equally. """
+
+    # whether only one player's regrets are updated per iteration, in turn
+    alternate = False
+
+    def __init__(self, alternate: bool=None) -> None:
+        if alternate is not None:
+            self.alternate = alternate
+
+    def weight(self, t: int) -> float:
+        """ Weight of iteration t's strategy in the average strategy. """
+        return 1
+
+    def update(self, regret_sum: np.ndarray, strategy_sum: np.ndarray, t: int) -> None:
+        """ Adjusts the accumulated sums in place after iteration t. """
+
+class CFRPlus(Vanilla):
+
+    """ Regrets floored at zero and linearly weighted averaging. """
+
+    alternate = True
+
+    def weight(self, t: int) -> float:
+        return t
+
+    def update(self, regret_sum: np.ndarray, strategy_sum: np.ndarray, t: int) -> None:
+        np.maximum(regret_sum, 0, out=regret_sum)
+
+class Discounted(Vanilla):
+
+    """ Discounts positive regrets by t^alpha/(t^alpha + 1), negative ones by
+    t^beta/(t^beta + 1) and the strategy sums by (t/(t + 1))^gamma. """
+
+    def __init__(self, alpha: float=1.5, beta: float=0, gamma: float=2, alternate: bool=None) -> None:
+        super().__init__(alternate)
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+
+    def update(self, regret_sum: np.ndarray, strategy_sum: np.ndarray, t: int) -> None:
+        positive, negative = t**self.alpha, t**self.beta
+        regret_sum *= np.where(regret_sum > 0, positive/(positive + 1), negative/(negative + 1))
+        strategy_sum *= (t/(t + 1))**self.gamma
+
+class Linear(Discounted):
+
+    """ Weights both the regrets and the average strategy of iteration t by t. """
+
+    def __init__(self, alternate: bool=None) -> None:
+        super().__init__(1, 1, 1, alternate)
+
+# name of each rule for selecting one by string
+rules = {"vanilla": Vanilla, "cfr+": CFRPlus, "linear": Linear, "discounted": Discounted}
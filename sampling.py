@@ -0,0 +1,69 @@
+# fast sampling of actions from mixed strategies
+import bisect, itertools, random
+import numpy as np
+"""
+strategies that change every iteration are sampled with a scan, or for many
+actions a binary search, over their cumulative sums. fixed strategies, like a
+known opponent, get an alias table once, after which every sample costs a
+single uniform draw and a comparison and many can be drawn at once. trained
+average strategies are sampled through policy.Policy.
+"""
+
+# number of samples drawn at once for a fixed strategy
+BATCH = 4096
+# largest number of actions scanned linearly rather than binary searched
+SCAN = 64
+
+def rng() -> np.random.Generator:
+    """ Gets a numpy generator seeded from random, so seeding random reproduces it. """
+    return np.random.default_rng(random.getrandbits(64))
+
+def get_action(strategy: list) -> int:
+    """ Gets a random action according to the mixed-strategy distribution. """
+    r = random.random()
+    if len(strategy) > SCAN:
+        return min(bisect.bisect_right(list(itertools.accumulate(strategy)), r), len(strategy) - 1)
+    a = cum_prob = 0
+    while a < len(strategy) - 1:
+        cum_prob += strategy[a]
+        if r < cum_prob:
+            break
+        a += 1
+    return a
+
+class Alias:
+
+    """ Vose's alias table of a fixed distribution. """
+
+    def __init__(self, strategy, generator: np.random.Generator=None) -> None:
+        p = np.asarray(strategy, dtype=np.float64)
+        n = len(p)
+        scaled = p*n/p.sum()
+        self.prob, self.alias = np.ones(n), np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1]
+        large = [i for i in range(n) if scaled[i] >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s], self.alias[s] = scaled[s], l
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+        self.rng = generator or rng()
+
+    def sample(self, size: int=None) -> np.ndarray:
+        """ Draws size actions at once, or a single one. """
+        i = self.rng.integers(len(self.prob), size=size)
+        return np.where(self.rng.random(size) < self.prob[i], i, self.alias[i])
+
+class Sampler(Alias):
+
+    """ Draws single actions from a fixed strategy out of a pre-drawn batch. """
+
+    def __init__(self, strategy, generator: np.random.Generator=None, batch: int=BATCH) -> None:
+        super().__init__(strategy, generator)
+        self.batch, self.buffer, self.i = batch, [], 0
+
+    def draw(self) -> int:
+        if self.i == len(self.buffer):
+            self.buffer, self.i = self.sample(self.batch).tolist(), 0
+        self.i += 1
+        return self.buffer[self.i - 1]
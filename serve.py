@@ -0,0 +1,120 @@
+# local request/response server for trained policies
+import asyncio, json, os, stat, sys, time
+import numpy as np
+import policy
+"""
+the protocol is one json object per line each way. a request has a list of
+information set keys and whether to sample an action for each, such as
+
+    {"keys": [1, 2, 3], "sample": true}
+
+and is answered in order with {"actions": [...]} when sampled, or otherwise
+{"strategies": [[...], ...]}, or {"error": "..."} if a key is unknown or the
+request is malformed. the server reads from stdin and writes to stdout, or
+listens on a unix socket.
+"""
+
+# p99 latency of a request the service should stay under, in seconds
+TARGET_P99 = 1e-3
+
+def answer(frozen: policy.Policy, line: bytes) -> bytes:
+    """ Answers a single request line. """
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict) or "keys" not in request:
+            raise ValueError("expected an object with keys")
+        keys = request["keys"]
+        if request.get("sample", False):
+            response = {"actions": frozen.sample(keys).tolist()}
+        else:
+            response = {"strategies": frozen.distributions(keys).tolist()}
+    except KeyError as e:
+        response = {"error": f"unknown information set {e}"}
+    except (ValueError, TypeError) as e:
+        response = {"error": f"malformed request: {e}"}
+    return json.dumps(response).encode() + b"\n"
+
+async def handle(frozen: policy.Policy, reader: asyncio.StreamReader, writer) -> None:
+    """ Answers requests until the other side closes its end. """
+    while line := await reader.readline():
+        writer.write(answer(frozen, line))
+        await writer.drain()
+    writer.close()
+
+async def serve_socket(frozen: policy.Policy, path: str) -> None:
+    """ Serves requests over a unix socket at path until cancelled. """
+    if os.path.exists(path):
+        os.remove(path)
+    server = await asyncio.start_unix_server(lambda r, w: handle(frozen, r, w), path)
+    async with server:
+        await server.serve_forever()
+
+def pipe(f) -> bool:
+    """ Whether a file can back a pipe transport, which regular files cannot. """
+    mode = os.fstat(f.fileno()).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode)
+
+async def serve_stdio(frozen: policy.Policy) -> None:
+    """ Serves requests from stdin, answering on stdout. """
+    loop = asyncio.get_running_loop()
+    if not (pipe(sys.stdin) and pipe(sys.stdout)):
+        # redirected from or to a file, so block on it in a thread instead
+        while line := await loop.run_in_executor(None, sys.stdin.buffer.readline):
+            await loop.run_in_executor(None, sys.stdout.buffer.write, answer(frozen, line))
+        sys.stdout.buffer.flush()
+        return
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    await handle(frozen, reader, writer)
+
+def serve(nodes, path: str=None) -> None:
+    """ Serves a frozen copy of a strategy table, over a unix socket if a path is given. """
+    frozen = policy.Policy(nodes)
+    asyncio.run(serve_socket(frozen, path) if path is not None else serve_stdio(frozen))
+
+async def client(path: str, keys: list, requests: int, batch: int, sample: bool) -> list:
+    """ Sends requests for random batches of keys one at a time, returning the latency of each. """
+    reader, writer = await asyncio.open_unix_connection(path)
+    rng = np.random.default_rng(0)
+    latencies = []
+    for _ in range(requests):
+        batch_keys = [keys[i] for i in rng.integers(len(keys), size=batch)]
+        line = json.dumps({"keys": batch_keys, "sample": sample}).encode() + b"\n"
+        start = time.perf_counter()
+        writer.write(line)
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+    return latencies
+
+def bench(nodes, requests: int=10000, batch: int=1, sample: bool=True, path: str="policy.sock") -> dict:
+    """ Measures the request latencies and throughput of a server for a strategy table. """
+    async def run() -> list:
+        server = asyncio.create_task(serve_socket(policy.Policy(nodes), path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        try:
+            return await client(path, list(nodes.keys()), requests, batch, sample)
+        finally:
+            server.cancel()
+
+    latencies = np.array(asyncio.run(run()))
+    os.remove(path)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {"p50": p50, "p99": p99, "target p99": TARGET_P99, "met": bool(p99 <= TARGET_P99),
+            "requests/sec": len(latencies)/latencies.sum(), "queries/sec": batch*len(latencies)/latencies.sum()}
+
+if __name__ == "__main__":
+    import cfr
+    nodes, util = cfr.dudo_train(10**2, engine="vector")
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        for batch in [1, 64]:
+            result = bench(nodes, batch=batch)
+            print(f"batch {batch: <3} p50 {1e6*result['p50']:7.1f} us  p99 {1e6*result['p99']:7.1f} us  "
+                  f"{result['requests/sec']:9,.0f} requests/sec {result['queries/sec']:10,.0f} queries/sec")
+    else:
+        serve(nodes, sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,172 @@
+# compact array-backed storage for information set nodes
+import numpy as np
+import matching, rules
+
+class Store:
+
+    """ Holds every information set in contiguous float64 matrices,
+    one row per information set indexed by a dense integer id. """
+
+    def __init__(self, actions: int, capacity: int=1024, rule: rules.Vanilla=None) -> None:
+        self.actions = actions
+        # info set key -> dense id
+        self.ids = {}
+        self.info_sets = []
+        self.size = 0
+        self._allocate(capacity)
+        self.rule = rules.Vanilla() if rule is None else rule
+        # current iteration, and the only player whose regrets update if alternating
+        self.t = 1
+        self.updating = None
+
+    def _allocate(self, capacity: int) -> None:
+        """ Resizes the backing arrays, preserving existing rows. """
+        old = getattr(self, "regret_sum", None)
+        arrays = {}
+        for name, dtype in [("regret_sum", np.float64), ("strategy", np.float64),
+                            ("strategy_sum", np.float64), ("l", np.int64), ("r", np.int64)]:
+            shape = (capacity, self.actions) if dtype is np.float64 else (capacity,)
+            arrays[name] = np.zeros(shape, dtype=dtype)
+            if old is not None:
+                arrays[name][:self.size] = getattr(self, name)[:self.size]
+        self.__dict__.update(arrays)
+        self.capacity = capacity
+
+    def add(self, key, info_set: str, l: int=0, r: int=None) -> "Node":
+        """ Creates a node for the key with legal actions in [l, r). """
+        if self.size == self.capacity:
+            self._allocate(2*self.capacity)
+        i = self.size
+        self.ids[key] = i
+        self.info_sets.append(info_set)
+        self.l[i], self.r[i] = l, self.actions if r is None else r
+        self.size += 1
+        return Node(self, i)
+
+    def replace(self, other: "Store") -> None:
+        """ Takes over the contents of another store, keeping references to this one valid. """
+        self.__dict__.update(other.__dict__)
+
+    def __contains__(self, key) -> bool:
+        return key in self.ids
+
+    def __getitem__(self, key) -> "Node":
+        return Node(self, self.ids[key])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def keys(self):
+        return self.ids.keys()
+
+    def values(self):
+        return (Node(self, i) for i in range(self.size))
+
+    def items(self):
+        return ((key, Node(self, i)) for key, i in self.ids.items())
+
+    @property
+    def weight(self) -> float:
+        """ Weight of the current iteration in the average strategy. """
+        return self.rule.weight(self.t)
+
+    def updates(self, player: int) -> bool:
+        """ Whether the player's regrets are updated this iteration. """
+        return self.updating is None or self.updating == player
+
+    def step(self) -> None:
+        """ Ends an iteration, applying the update rule to the accumulated sums. """
+        self.rule.update(self.regret_sum[:self.size], self.strategy_sum[:self.size], self.t)
+        self.t += 1
+
+    def legal(self, ids: np.ndarray) -> np.ndarray:
+        """ Gets the legal action mask for a batch of ids. """
+        return matching.legal_mask(self.l[ids], self.r[ids], self.actions)
+
+    def get_strategy(self, ids: np.ndarray, realization_weight=1) -> np.ndarray:
+        """ Regret-matches a batch of information sets at once. """
+        strategy = matching.regret_matching(self.regret_sum[ids], self.legal(ids))
+        self.strategy[ids] = strategy
+        matching.accumulate_strategy(self.strategy_sum, strategy, realization_weight*self.weight, ids)
+        return strategy
+
+    def get_average_strategy(self, ids: np.ndarray=None) -> np.ndarray:
+        """ Gets the average strategies of a batch of ids, by default all of them. """
+        ids = np.arange(self.size) if ids is None else ids
+        return matching.regret_matching(self.strategy_sum[ids], self.legal(ids))
+
+    def regret(self, ids: np.ndarray, action_util: np.ndarray, my_util: np.ndarray,
+               realization_weight=1) -> None:
+        """ Accumulates the regrets of a batch of information sets at once. """
+        matching.accumulate_regret(self.regret_sum, action_util, my_util,
+                                   realization_weight, self.legal(ids), ids)
+
+    def __getstate__(self) -> dict:
+        """ Trims unused capacity before pickling. """
+        state = dict(self.__dict__)
+        for name in ["regret_sum", "strategy", "strategy_sum", "l", "r"]:
+            state[name] = state[name][:self.size].copy()
+        state["capacity"] = self.size
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        # stores pickled before update rules train as vanilla cfr
+        self.__dict__.update({"rule": rules.Vanilla(), "t": 1, "updating": None, **state})
+        if self.capacity == 0:
+            self._allocate(1)
+
+class Node:
+
+    """ Thin view of a single information set row in a store. """
+
+    __slots__ = ("store", "i")
+
+    def __init__(self, store: Store, i: int) -> None:
+        self.store, self.i = store, i
+
+    @property
+    def info_set(self) -> str:
+        return self.store.info_sets[self.i]
+
+    @property
+    def regret_sum(self) -> np.ndarray:
+        return self.store.regret_sum[self.i]
+
+    @property
+    def strategy(self) -> np.ndarray:
+        return self.store.strategy[self.i]
+
+    @property
+    def strategy_sum(self) -> np.ndarray:
+        return self.store.strategy_sum[self.i]
+
+    def get_strategy(self, realization_weight: float=1) -> list:
+        """ Gets the current mixed strategy through regret-matching. """
+        s, i = self.store, self.i
+        l, r = s.l[i], s.r[i]
+        strategy = matching.regret_matching(s.regret_sum[i, l:r], out=s.strategy[i, l:r])
+        matching.accumulate_strategy(s.strategy_sum[i, l:r], strategy, realization_weight*s.weight)
+        # plain floats are much cheaper to index in the recursive traversals
+        return s.strategy[i].tolist()
+
+    def get_average_strategy(self) -> np.ndarray:
+        """ Gets the average mixed strategy across all training iterations. """
+        s, i = self.store, self.i
+        l, r = s.l[i], s.r[i]
+        strategy = np.zeros(s.actions)
+        # the strategy sums are non-negative, so regret-matching them normalizes
+        matching.regret_matching(s.strategy_sum[i, l:r], out=strategy[l:r])
+        return strategy
+
+    def regret(self, action_util: list, my_util: float, realization_weight: float=1) -> None:
+        """ Updates regret based upon an utility list and the current utility. """
+        s, i = self.store, self.i
+        l, r = s.l[i], s.r[i]
+        matching.accumulate_regret(s.regret_sum[i, l:r], np.asarray(action_util[l:r]), my_util, realization_weight)
+
+    def __str__(self) -> str:
+        """ Gets the information set string representation. """
+        return f"{self.info_set: <3}: {list(map(lambda x: round(x, 3), self.get_average_strategy().tolist()))}"
@@ -0,0 +1,93 @@
+# regret-matching for normal form games between many symmetric players
+import numpy as np
+import matching, rules, metrics, sampling
+"""
+every player of a symmetric game has the same actions and payoffs, so they
+all share a single regret table and strategy, and an iteration updates every
+player at once. a game gives
+
+    -   PLAYERS: the number of players
+    -   ACTIONS: the number of actions
+    -     utils: the util of every action for a player who played each of a
+                 list of actions, against the others given by the histogram of
+                 the actions of every player, that player included
+    -  expected: the expected util of every action against every other
+                 player playing a mixed strategy
+
+unless sampled, regrets are taken against the expected utils. otherwise
+every player's action is drawn at once as a histogram, and players who played
+the same action face the same opponents, so the utils are computed once per
+distinct action played and weighted by how many played it. the regrets are
+those of the average player, so their scale does not grow with PLAYERS.
+"""
+
+class Symmetric:
+
+    """ The strategy shared by every player of a symmetric game. """
+
+    def __init__(self, game, rule: rules.Vanilla=None) -> None:
+        self.game = game
+        self.regret_sum = np.zeros(game.ACTIONS)
+        self.strategy = np.zeros(game.ACTIONS)
+        self.strategy_sum = np.zeros(game.ACTIONS)
+        self.rule = rules.Vanilla() if rule is None else rule
+        self.t = 1
+
+    def get_strategy(self) -> np.ndarray:
+        """ Gets the current mixed strategy through regret-matching. """
+        matching.regret_matching(self.regret_sum, out=self.strategy)
+        matching.accumulate_strategy(self.strategy_sum, self.strategy, self.rule.weight(self.t))
+        return self.strategy
+
+    def step(self) -> None:
+        """ Ends an iteration, applying the update rule to the accumulated sums. """
+        self.rule.update(self.regret_sum, self.strategy_sum, self.t)
+        self.t += 1
+
+    def get_average_strategy(self) -> np.ndarray:
+        """ Gets the average mixed strategy across all training iterations. """
+        return self.strategy_sum/self.strategy_sum.sum()
+
+    def exploitability(self, strategy: np.ndarray=None) -> float:
+        """ Gets how much a single player gains by deviating from everyone
+        playing a strategy, by default the average strategy. """
+        strategy = self.get_average_strategy() if strategy is None else strategy
+        return metrics.gap(self.game.expected(strategy), strategy)
+
+    def train(self, iters: int, graph: bool=False, sampled: bool=False,
+              generator: np.random.Generator=None) -> np.ndarray:
+        """ Calculates the symmetric equilibrium. graph is a metrics.Series,
+        or True for the default one, which gets the average strategy and its
+        exploitability and is returned instead. """
+        series = metrics.Series() if graph is True else graph or None
+        game = self.game
+        generator = sampling.rng() if generator is None else generator
+
+        for i in range(iters):
+            strategy = self.get_strategy()
+            if sampled:
+                counts = generator.multinomial(game.PLAYERS, strategy)
+                played = np.flatnonzero(counts)
+                utils = game.utils(counts, played)
+                weights = counts[played]/game.PLAYERS
+                action_util = weights @ utils
+                my_util = weights @ utils[np.arange(len(played)), played]
+            else:
+                action_util = game.expected(strategy)
+                my_util = action_util @ strategy
+            matching.accumulate_regret(self.regret_sum, action_util, my_util)
+            self.step()
+
+            if series is not None and series.due(i + 1):
+                average = self.get_average_strategy()
+                series.record(i + 1, average, self.exploitability(average))
+
+        return series if series is not None else self.get_average_strategy()
+
+if __name__ == "__main__":
+    import registry
+    # the council's best split, from the auction's equilibrium at every reward
+    for reward in range(0, 101, 20):
+        game = registry.get("cans", 20, reward, 100)
+        strategy = Symmetric(game, rules.Discounted()).train(10**4)
+        print(f"reward {reward: >3}: {game.cans(strategy):7.2f} cans expected")
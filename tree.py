@@ -0,0 +1,327 @@
+# game trees compiled once into flat arrays for fast traversals
+import numpy as np
+import store, matching
+"""
+an extensive-form game should implement, on top of util:
+    - privates: the possible private information of a player
+    -    deals: every equally likely chance outcome, a private info per player,
+               or with weights, the probability of each outcome
+    -     root: the empty history
+    - get_player: the player to act given a history
+    -    legal: the contiguous range of legal actions given a history
+    -     play: the history after an action
+    - hash_info_set, format_info_set: the key and label of an information set
+
+public nodes are numbered in breadth-first order so children always come
+after their parent, and the children of a node are contiguous, one per
+legal action in order.
+"""
+
+TERMINAL = -1
+
+class Tree:
+
+    """ A game flattened into per-node arrays. """
+
+    def __init__(self, game, nodes: store.Store) -> None:
+        histories = [game.root()]
+        player, mover, first, l, r, payoff = [], [], [], [], [], []
+        deals = [tuple(info) for info in game.deals]
+
+        n = 0
+        while n < len(histories):
+            history = histories[n]
+            mover.append(game.get_player(history))
+            util = game.util(deals[0], history)
+            if util is not None:
+                player.append(TERMINAL)
+                first.append(0)
+                l.append(0)
+                r.append(0)
+                payoff.append([game.util(info, history) for info in deals])
+            else:
+                player.append(game.get_player(history))
+                actions = game.legal(history)
+                first.append(len(histories))
+                l.append(actions.start)
+                r.append(actions.stop)
+                payoff.append([0]*len(deals))
+                histories += [game.play(history, a) for a in actions]
+            n += 1
+
+        self.size = len(histories)
+        self.player = np.array(player, dtype=np.int64)
+        # the player to move, at terminal nodes the one whose perspective payoff is from
+        self.mover = np.array(mover, dtype=np.int64)
+        self.first = np.array(first, dtype=np.int64)
+        self.l, self.r = np.array(l, dtype=np.int64), np.array(r, dtype=np.int64)
+        self.payoff = np.array(payoff, dtype=np.float64)
+        self.parent = np.zeros(self.size, dtype=np.int64)
+        for p in np.flatnonzero(self.player != TERMINAL):
+            self.parent[self.first[p]:self.first[p] + self.r[p] - self.l[p]] = p
+        self.depth = np.zeros(self.size, dtype=np.int64)
+        for c in range(1, self.size):
+            self.depth[c] = self.depth[self.parent[c]] + 1
+
+        # private info of each player for every deal, as an index into privates
+        index = {info: i for i, info in enumerate(game.privates)}
+        self.privates = len(game.privates)
+        self.deals = np.array([[index[info] for info in deal] for deal in deals], dtype=np.int64)
+        self.deal_index = {deal: d for d, deal in enumerate(deals)}
+        self.weights = np.asarray(getattr(game, "weights", np.full(len(deals), 1/len(deals))), dtype=np.float64)
+        # chance[i, j] is the probability of privates i and j being dealt
+        self.chance = np.zeros((self.privates, self.privates))
+        np.add.at(self.chance, (self.deals[:, 0], self.deals[:, 1]), self.weights)
+        # chance weighted payoffs for player 0 of every terminal over pairs of privates
+        self.terminals = np.flatnonzero(self.player == TERMINAL)
+        sign = np.where(self.mover[self.terminals] == 0, 1, -1)
+        self.terminal_payoff = np.zeros((len(self.terminals), self.privates, self.privates))
+        for d, (i, j) in enumerate(self.deals):
+            self.terminal_payoff[:, i, j] += sign*self.payoff[self.terminals, d]*self.weights[d]
+
+        # information set row in the store for each decision node and private info
+        self.infoset = np.full((self.size, self.privates), -1, dtype=np.int64)
+        for n in np.flatnonzero(self.player != TERMINAL):
+            for p, info in enumerate(game.privates):
+                key = game.hash_info_set(info, histories[n])
+                if key not in nodes:
+                    nodes.add(key, game.format_info_set(info, histories[n]), self.l[n], self.r[n])
+                self.infoset[n, p] = nodes.ids[key]
+        self.nodes = nodes
+        # a prune.Pruning for the recursive traversal, if any
+        self.pruning = None
+
+        # decision nodes, and the action leading into every node from its parent
+        self.decisions = np.flatnonzero(self.player != TERMINAL)
+        self.decision = np.full(self.size, -1, dtype=np.int64)
+        self.decision[self.decisions] = np.arange(len(self.decisions))
+        self.action = np.zeros(self.size, dtype=np.int64)
+        for p in self.decisions:
+            self.action[self.first[p]:self.first[p] + self.r[p] - self.l[p]] = np.arange(self.l[p], self.r[p])
+        self.legal = matching.legal_mask(self.l[self.decisions], self.r[self.decisions], game.ACTIONS)
+        # whether every information set is a single (node, private info) pair
+        rows = self.infoset[self.decisions]
+        self.unique = len(np.unique(rows)) == rows.size
+        # breadth-first order keeps every depth contiguous
+        self.levels = np.split(np.arange(self.size), np.flatnonzero(np.diff(self.depth)) + 1)
+        # the distinct parents of each level below the root and where their children start
+        self.families = []
+        for level in self.levels[1:]:
+            starts = np.flatnonzero(np.diff(self.parent[level], prepend=-1))
+            self.families.append((self.parent[level][starts], starts))
+
+        # scratch space for the utility of every node in a traversal
+        self.value = np.zeros(self.size)
+        self.reach = np.zeros((2, self.size))
+        self.util = np.zeros((len(self.decisions), game.ACTIONS))
+        self.reach_vectors = np.zeros((2, self.size, self.privates))
+        self.value_vectors = np.zeros((2, self.size, self.privates))
+        self.util_vectors = np.zeros((len(self.decisions), self.privates, game.ACTIONS))
+        # plain lists are much cheaper to index in the scalar traversals
+        self._player, self._first = self.player.tolist(), self.first.tolist()
+        self._l, self._r = self.l.tolist(), self.r.tolist()
+        self._payoff, self._infoset = self.payoff.tolist(), self.infoset.tolist()
+        self._deals = self.deals.tolist()
+        # the strategy and child utils of every decision node in cfr
+        self._strategy = [[0.0]*(r - l) if p != TERMINAL else None for p, l, r in zip(self._player, self._l, self._r)]
+        self._utils = [list(row) if row is not None else None for row in self._strategy]
+
+    def updates(self, players: np.ndarray) -> np.ndarray:
+        """ Whether the regrets of each player are updated this iteration. """
+        return np.ones(len(players)) if self.nodes.updating is None else players == self.nodes.updating
+
+    def cfr(self, deal: int, n: int=0, p0: float=1, p1: float=1) -> float:
+        """ Counterfactual regret minimzation iteration for a single deal. the
+        strategy and child utils of a node go in buffers of its own, and the
+        sums are updated in place one action at a time. """
+        player = self._player[n]
+
+        # Return payoff for terminal states
+        if player == TERMINAL:
+            return self._payoff[n][deal]
+
+        i = self._infoset[n][self._deals[deal][player]]
+        first, l, r = self._first[n], self._l[n], self._r[n]
+        nodes, pruning = self.nodes, self.pruning
+        regret_sum = nodes.regret_sum
+        strategy, utils = self._strategy[n], self._utils[n]
+        traverser = nodes.updates(player)
+
+        # regret-matching into the node's buffer, uniform when no regret is positive
+        norm_sum = 0
+        for a in range(l, r):
+            regret = regret_sum[i, a]
+            regret = regret if regret > 0 else 0
+            strategy[a - l] = regret
+            norm_sum += regret
+        if norm_sum > 0:
+            for k in range(r - l):
+                strategy[k] /= norm_sum
+        else:
+            for k in range(r - l):
+                strategy[k] = 1/(r - l)
+        if pruning is None or pruning.averages(traverser):
+            strategy_sum, weight = nodes.strategy_sum, (p0 if player == 0 else p1)*nodes.weight
+            for a in range(l, r):
+                strategy_sum[i, a] += weight*strategy[a - l]
+
+        node_util = 0
+        pruned = False
+        for a in range(l, r):
+            k = a - l
+            q0, q1 = (p0*strategy[k], p1) if player == 0 else (p0, p1*strategy[k])
+            if pruning is not None and pruning.skip(regret_sum, i, a, strategy[k], player, q0, q1, traverser):
+                utils[k] = None
+                pruned = True
+                continue
+            # negative because next call's value is from the opponent's perspective
+            util = -self.cfr(deal, first + k, q0, q1)
+            utils[k] = util
+            node_util += strategy[k]*util
+
+        # skipped actions are never played, so leave their regrets as they are until caught up
+        if pruned:
+            for k in range(r - l):
+                if utils[k] is None:
+                    utils[k] = node_util
+
+        # For each action, compute and accumulate counterfactual regret
+        if traverser:
+            reach = p1 if player == 0 else p0
+            for a in range(l, r):
+                regret_sum[i, a] += reach*(utils[a - l] - node_util)
+            if pruning is not None:
+                pruning.catch_up(regret_sum, i, utils, node_util, l)
+
+        return node_util
+
+    def iterative_cfr(self, deal: int) -> float:
+        """ Counterfactual regret minimzation iteration for a single deal,
+        computing the same updates as cfr level by level without recursion.
+        all strategies are regret-matched up front from the regrets at the start
+        of the deal, reach probabilities pushed down one depth at a
+        time and utilities pulled back up one depth at a time. """
+        nodes, decisions = self.nodes, self.decisions
+        players = self.player[decisions]
+        rows = self.infoset[decisions, self.deals[deal][players]]
+        strategy = matching.regret_matching(nodes.regret_sum[rows], self.legal)
+
+        reach = self.reach
+        reach[:, 0] = 1
+        for level in self.levels[1:]:
+            parent, action = self.parent[level], self.action[level]
+            player = self.player[parent]
+            reach[:, level] = reach[:, parent]
+            reach[player, level] *= strategy[self.decision[parent], action]
+
+        value = self.value
+        value[:] = self.payoff[:, deal]
+        util = self.util
+        for level in reversed(self.levels[1:]):
+            parent, action = self.parent[level], self.action[level]
+            # negative because the children's values are from the opponent's perspective
+            util[self.decision[parent], action] = -value[level]
+            # decision nodes start at zero, terminal ones in between get nothing added
+            value[parent[0]:parent[-1] + 1] += np.bincount(
+                parent - parent[0], strategy[self.decision[parent], action]*-value[level])
+
+        nodes.strategy[rows] = strategy
+        # under imperfect recall a deal can reach an information set more than once
+        matching.accumulate_strategy(nodes.strategy_sum, strategy, nodes.weight*reach[players, decisions],
+                                     rows, self.unique)
+        matching.accumulate_regret(nodes.regret_sum, util, value[decisions],
+                                   self.updates(players)*reach[1 - players, decisions], self.legal, rows, self.unique)
+        return value[0]
+
+    def vector_cfr(self) -> float:
+        """ Counterfactual regret minimzation iteration over every deal at once.
+        the public tree is traversed a single time carrying, for each player, a
+        vector over their private infos of reach probabilities on the way down
+        and counterfactual values on the way up. terminal values are products
+        of the chance weighted payoff matrices with the opponent's reach. """
+        nodes, decisions = self.nodes, self.decisions
+        players = self.player[decisions]
+        rows = self.infoset[decisions]
+        legal = np.broadcast_to(self.legal[:, None, :], rows.shape + (self.legal.shape[1],))
+        strategy = matching.regret_matching(nodes.regret_sum[rows], legal)
+
+        reach = self.reach_vectors
+        reach[:, 0] = 1
+        for level in self.levels[1:]:
+            parent, action = self.parent[level], self.action[level]
+            player = self.player[parent]
+            reach[:, level] = reach[:, parent]
+            reach[player, level] *= strategy[self.decision[parent], :, action]
+
+        # counterfactual values, each player's from their own perspective
+        value = self.value_vectors
+        value[:] = 0
+        terminal_payoff = self.terminal_payoff
+        value[0, self.terminals] = np.einsum("nij,nj->ni", terminal_payoff, reach[1, self.terminals])
+        value[1, self.terminals] = -np.einsum("nij,ni->nj", terminal_payoff, reach[0, self.terminals])
+        util = self.util_vectors
+        for level, (parents, starts) in zip(reversed(self.levels[1:]), reversed(self.families)):
+            parent, action = self.parent[level], self.action[level]
+            player, owner = self.player[parent], self.player[parents]
+            util[self.decision[parent], :, action] = value[player, level]
+            # children of a parent are contiguous, so sum them up in runs
+            value[owner, parents] = np.add.reduceat(
+                strategy[self.decision[parent], :, action]*value[player, level], starts)
+            value[1 - owner, parents] = np.add.reduceat(value[1 - player, level], starts)
+
+        node_util = value[players, decisions]
+        rows, size = rows.reshape(-1), len(decisions)*self.privates
+        nodes.strategy[rows] = strategy.reshape(size, -1)
+        matching.accumulate_strategy(nodes.strategy_sum, strategy.reshape(size, -1),
+                                     nodes.weight*reach[players, decisions].reshape(-1), rows, self.unique)
+        matching.accumulate_regret(nodes.regret_sum, util.reshape(size, -1), node_util.reshape(-1),
+                                   np.repeat(self.updates(players), self.privates), legal.reshape(size, -1),
+                                   rows, self.unique)
+        return value[0, 0].sum()
+
+    def best_response(self, player: int) -> float:
+        """ Gets the value for player of best responding to the other player's
+        average strategy, walking the public tree with the opponent's reach
+        vector on the way down and player's counterfactual values back up. """
+        opp, decisions = player ^ 1, self.decisions
+        rows = self.infoset[decisions]
+        strategy = self.nodes.get_average_strategy(rows.reshape(-1)).reshape(rows.shape + (-1,))
+
+        reach = np.ones((self.size, self.privates))
+        for level in self.levels[1:]:
+            parent, action = self.parent[level], self.action[level]
+            reach[level] = reach[parent]
+            acting = self.player[parent] == opp
+            reach[level[acting]] *= strategy[self.decision[parent[acting]], :, action[acting]]
+
+        value = np.zeros((self.size, self.privates))
+        if player == 0:
+            value[self.terminals] = np.einsum("nij,nj->ni", self.terminal_payoff, reach[self.terminals])
+        else:
+            value[self.terminals] = -np.einsum("nij,ni->nj", self.terminal_payoff, reach[self.terminals])
+
+        for level, (parents, starts) in zip(reversed(self.levels[1:]), reversed(self.families)):
+            parent, action = self.parent[level], self.action[level]
+            # the opponent's strategy is already folded into the reach, so sum
+            value[parents] = np.add.reduceat(value[level], starts)
+            mine = self.player[parents] == player
+            if not mine.any():
+                continue
+            # otherwise take the action with the best value summed over each information set
+            own = self.player[parent] == player
+            index = self.decision[parents[mine]]
+            util = np.full((len(decisions), self.privates, self.legal.shape[1]), -np.inf)
+            util[self.decision[parent[own]], :, action[own]] = value[level[own]]
+            util = util[index]
+            keys, inverse = np.unique(rows[index], return_inverse=True)
+            total = np.zeros((len(keys), util.shape[-1]))
+            np.add.at(total, inverse.reshape(-1), util.reshape(-1, util.shape[-1]))
+            best = total.argmax(axis=1)[inverse.reshape(util.shape[:2])]
+            value[parents[mine]] = np.take_along_axis(util, best[..., None], axis=2)[..., 0]
+
+        return value[0].sum()
+
+    def exploitability(self) -> float:
+        """ Gets how much a best responder gains on average per game against the
+        average strategies, zero exactly at a Nash equilibrium. """
+        return (self.best_response(0) + self.best_response(1))/2